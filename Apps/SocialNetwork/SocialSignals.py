@@ -284,7 +284,7 @@ if __name__ == "__main__":
 	Gbl = SocialSimulation.Global()
 	if Gbl['BatchMode'] == 0:	print(__doc__)
 	Start()
-	SocialSimulation.Start(Params=Gbl, PopClass=Population, ObsClass=Observer)
+	SocialSimulation.Start(Params=Gbl, PopClass=Population, ObsClass=Observer, Setup=Start)
 
 
 __author__ = 'Dessalles'
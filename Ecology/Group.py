@@ -28,25 +28,36 @@ if __name__ == '__main__':
 	InstantiateScenario('Cooperation')
 
 
-from random import randint, sample, shuffle
+from random import randint
 
+from Evolife.Tools import RandomStreams
 from Evolife.Ecology.Individual import Individual, EvolifeIndividual
 from Evolife.Ecology.Observer import Examiner		# for statistics
+from Evolife.Social.Alliances import Liker	# individuals with social links
 from Evolife.Tools.Tools import error
 
 class Group:
 	"""	A group is mainly a list of individuals 
 	"""
-	def __init__(self, Scenario, ID=1, Size=100):
+	TracksMovers = False	# whether arrivals and departures are recorded for 'linked_to_movers'
+
+	def __init__(self, Scenario, ID=1, Size=100, Network=None):
 		self.Scenario = Scenario	# Scenario just holds parameters + new_agent
+		self.Network = Network	# optional SocialGraph shared by the population
 		self.size = 0
 		self.members = []
+		self.memberSet = set()	# same as members, for fast membership tests
+		# ====== movements since last network check (only recorded if Network is available and TracksMovers)
+		self.arrived = []
+		self.departed = []
 		# ====== ranking is used to store a sorted list of individuals in the group
 		self.ranking = []   
 		self.best_score = 0
 		self.ID = ID
 		self.location = 0   # geographical position 
 		self.Examiner = Examiner('GroupObs'+str(self.ID))
+		# ====== optional gene histograms (gene values are between 0 and 100)
+		self.Examiner.distribution('Genomes', self.Scenario.Parameter('GeneHistogramBins', Default=0))
 		for individual in range(Size):
 			Indiv = self.createIndividual(Newborn=False)
 			# ====== let scenario know that there is a newcomer	
@@ -58,7 +69,7 @@ class Group:
 	def free_ID(self, Prefix=None):
 		"""	returns an available ID 
 		"""
-		IDs = [m.ID for m in self.members]
+		IDs = {m.ID for m in self.members}
 		if Prefix is None:	Prefix = f'{self.ID}_'	# considering group number as prefix
 		for ii in range(1000000):
 			ID = f'{Prefix}{ii}'
@@ -76,7 +87,19 @@ class Group:
 		try:	return self.members[Number]
 		except IndexError:	error('Group', 'selecting non-existent individual')
 
-	def isMember(self, indiv):	return	indiv in self.members
+	def isMember(self, indiv):	return	indiv in self.memberSet
+
+	def linked_to_movers(self):
+		"""	returns members whose social links may point outside the group,
+			i.e. newcomers and members that like individuals that left.
+			Without Network, all members are returned.
+		"""
+		if self.Network is None:	return self.members
+		Concerned = set(self.arrived)
+		for Gone in self.departed:	Concerned.update(self.Network.likers(Gone))
+		self.arrived = []
+		self.departed = []
+		return [m for m in self.members if m in Concerned]
 	
 	def update_(self, flagRanking = False, display=False):
 		""" updates various facts about the group
@@ -94,7 +117,7 @@ class Group:
 			self.ranking.sort(key=lambda x: x.score(), reverse=True)
 			if self.ranking != [] and self.ranking[0].score() == 0 and self.ranking[-1] == 0:
 				# ====== all scores are zero
-				shuffle(self.ranking)  # not always the same ones first
+				RandomStreams.stream('Group', self.ID, 'Ranking').shuffle(self.ranking)  # not always the same ones first
 			self.best_score = self.ranking[0].score()
 		return self.size
 
@@ -130,6 +153,8 @@ class Group:
 		indiv = self.whoIs(memberNbr)
 		indiv.dies()	# let the victim know
 		self.size -= 1
+		self.memberSet.discard(indiv)
+		if self.Network is not None and self.TracksMovers:	self.departed.append(indiv)
 		return self.members.pop(memberNbr)
 	
 	def remove_member(self, indiv):
@@ -147,6 +172,10 @@ class Group:
 		"""
 		if newcomer is not None:
 			self.members.append(newcomer)
+			self.memberSet.add(newcomer)
+			if self.Network is not None and isinstance(newcomer, Liker):	
+				newcomer.connect(self.Network)
+				if self.TracksMovers:	self.arrived.append(newcomer)
 			self.size += 1
 
 	def __len__(self):	return len(self.members)
@@ -165,6 +194,7 @@ class EvolifeGroup(Group):
 	"""	class Group: list of individuals that interact and reproduce.
 		Same as Group + reproduction + calls to Scenario functions.
 	"""
+	TracksMovers = True	# movers are consumed when social links are checked (see update_)
 
 	def createIndividual(self, Newborn=True):
 		"""	calls the 'EvolifeIndividual' class
@@ -188,8 +218,8 @@ class EvolifeGroup(Group):
 		if display:
 			if flagRanking:	self.Scenario.update_positions(self.ranking, self.location)
 			else:			self.Scenario.update_positions(self.members, self.location)
-		# ====== updating social links
-		for m in self.members:	m.checkNetwork(membershipFunction=self.isMember)
+		# ====== updating social links (only for members possibly linked to non-members)
+		for m in self.linked_to_movers():	m.checkNetwork(membershipFunction=self.isMember)
 		return size
 		
 	def reproduction(self):
@@ -206,8 +236,9 @@ class EvolifeGroup(Group):
 			# child = EvolifeIndividual(self.Scenario, ID=self.free_ID(), Newborn=True)			
 			child = self.createIndividual(Newborn=True)			
 			if child is not None:
-				child.hybrid(C[0],C[1]) # child's DNA results from parents' DNA crossover
-				child.mutate()
+				# ====== each group has its own genetic streams (see RandomStreams)
+				child.hybrid(C[0],C[1], Rnd=RandomStreams.stream('Group', self.ID, 'Crossover')) # child's DNA results from parents' DNA crossover
+				child.mutate(Rnd=RandomStreams.stream('Group', self.ID, 'Mutation'))
 				child.update()  # computes the value of genes, as DNA is available only now
 				if self.Scenario.new_agent(child, parents=C):  # let scenario decide something about the newcomer
 					self.receive(child) # adds child to the group
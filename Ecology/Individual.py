@@ -24,8 +24,7 @@ if __name__ == '__main__':  # for tests
 	InstantiateScenario('SexRatio')
 
 
-from random import randint
-
+from Evolife.Tools import RandomStreams
 from Evolife.Genetics.Genome import Genome
 from Evolife.Ecology.Phenotype import Phenome
 from Evolife.Social.Alliances import Liker as Follower
@@ -37,15 +36,16 @@ class Individual:
 
 	def __init__(self, Scenario, ID=None, Newborn = True):
 		self.Scenario = Scenario
+		self.LifeParams = Scenario.snapshot(AgeMax=0)	# parameters read in hot loops, frozen for this individual
 		if not Newborn:
 			# ====== Aged individuals are created when initializing a population
 			AgeMax = self.Scenario.Parameter('AgeMax', Default=100)
-			self.age = randint(1, AgeMax)
+			self.age = RandomStreams.stream('Individual', 'Age').randint(1, AgeMax)
 		else:	self.age = 0
 		if ID:
 			self.ID = ID
 		else:
-			self.ID = 'A' + str(randint(0,9999)) # permanent identification in the population
+			self.ID = 'A' + str(RandomStreams.stream('Individual', 'ID').randint(0,9999)) # permanent identification in the population
 		self.location = None   # location in a multi-dimensional space 
 		# ====== scores measures individual performance - Depending on Scenario, 
 		# ====== they control death probability (when converted into LifePoints)
@@ -69,7 +69,7 @@ class Individual:
 		"""	An individual is dead if it is too old or has lost all its 'LifePoints' 
 		"""
 		if self.LifePoints < 0:	return True
-		AgeMax = self.Scenario.Parameter('AgeMax', Default=0)
+		AgeMax = self.LifeParams.AgeMax
 		if AgeMax and (self.age > AgeMax):	return True
 		return False		
 	
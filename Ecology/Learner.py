@@ -24,8 +24,9 @@ if __name__ == '__main__':  # for tests
 	# InstantiateScenario('SexRatio')
 
 
-from random import random, randint
+from collections import deque
 from Evolife.Tools.Tools import boost, LimitedMemory, error
+from Evolife.Tools import RandomStreams
 
 
 # Global elements
@@ -38,13 +39,18 @@ class Global:
 		# Closer pushes x towards Target
 		self.Closer = lambda x, Target, Attractiveness: ((100.0 - Attractiveness) * x + Attractiveness * Target) / 100
 		# Perturbate is a mutation function
-		self.Perturbate = lambda x, Amplitude: x + (2 * random() - 1) * Amplitude
+		self.Perturbate = lambda x, Amplitude: x + (2 * rnd().random() - 1) * Amplitude
 		# Limitate keeps x within limits
 		self.Limitate = lambda x, Min, Max: min(max(x,Min), Max)
 		# Decrease is a linear decreasing function between 100 and MinY
 		self.Decrease = lambda x, MaxX, MinY: max(MinY, (100 - x * ((100.0 - MinY)/ MaxX)))
 
 
+def rnd():
+	"""	random stream used for learning (see RandomStreams)
+	"""
+	return RandomStreams.stream('Learning')
+
 Gbl = Global()
 
 class LimitedMemory_(LimitedMemory):
@@ -87,6 +93,8 @@ class Learner:
 		self.Features = Features	# Dictionary or list of features that will be learned
 		self.MemorySpan = MemorySpan
 		self.Scores = LimitedMemory_(self.MemorySpan)  # memory of past benefits
+		self.Folds = dict()	# for each feature, aggregated performances of memorized records (see bestFeatureRecord)
+		self.FoldVersion = -1	# version of Scores for which Folds are valid
 		self.AgeMax = AgeMax	# Max age before resetting
 		self.Performance = []	# stores current performances
 		self.Infancy = Infancy	# percentage of lifetime when the learner is considered a child
@@ -105,13 +113,15 @@ class Learner:
 		"""	Initializes Feature values to random values (if Start == -1)
 			Age set to random value if Newborn is False (useful at start)
 		"""
-		self.Age = 0 if Newborn else randint(0, self.AgeMax)	# age is random at initialization
+		self.Age = 0 if Newborn else rnd().randint(0, self.AgeMax)	# age is random at initialization
 		Features = dict()	# so that self.Features may be created as a list
 		for F in self.Features:
-			if self.Start == -1 or Newborn:	Features[F] = randint(0,100) 
+			if self.Start == -1 or Newborn:	Features[F] = rnd().randint(0,100) 
 			else: Features[F] = 100 * self.Start	# 0 or 100
 		self.Features = Features
 		self.Scores.reset()
+		self.Folds = {F: deque() for F in self.Features}
+		self.FoldVersion = self.Scores.Version
 
 	def adult(self):	
 		"""	adult if age larger than AgeMax*Infancy/100
@@ -154,23 +164,73 @@ class Learner:
 			Best = max(past, key = lambda x: x[1])
 			if second:	
 				# ------ retrieve the SECOND best solution so far
-				past = past[:]
+				past = list(past)
 				past.remove(Best)
 				Best = max(past, key = lambda x: x[1])
 		return Best
 		
+	def weight(self, Feature, Record, Other):
+		"""	Record's performance Perf1 is updated by Other's performance Perf2 through:
+				Perf1 = (Perf1 + Perf2 / (1 + dist)) * (1 + dist)/(2 + dist)
+			which is written Perf1 * w + k. Returns (w, k)
+		"""
+		dist = abs(Record[0][Feature] - Other[0][Feature]) / (0.001 + self.LearningSimilarity)
+		return ((1 + dist) / (2 + dist), Other[1] / (2 + dist))
+
+	def fold(self, Feature, Record, Past):
+		"""	Composes Record's successive updates by all records in Past.
+			Returns [A, B] such that aggregated performance is A * Perf1 + B
+		"""
+		(A, B) = (1.0, 0.0)
+		for Other in Past:
+			(w, k) = self.weight(Feature, Record, Other)
+			(A, B) = (A * w, B * w + k)
+		return [A, B]
+
+	def refold(self):
+		"""	recomputes aggregated performances of all records from scratch
+		"""
+		Past = list(self.Scores.retrieve())
+		self.Folds = {F: deque([self.fold(F, R, Past) for R in Past]) for F in self.Features}
+		self.FoldVersion = self.Scores.Version
+
+	def remember(self, Record):
+		"""	stores Record (features, performance) in memory
+			and updates aggregated performances incrementally: 
+			the forgotten record's update is removed and the new record's update is appended.
+			Cost is O(MemorySpan) per feature: every record's aggregated performance depends
+			on the new record, so a cheaper update would require another aggregation rule.
+		"""
+		InSync = (self.FoldVersion == self.Scores.Version)
+		Forgotten = self.Scores.push(Record)
+		if not InSync:	return	# Folds will be recomputed when needed
+		Past = self.Scores.retrieve()
+		for F in self.Features:
+			Folds = self.Folds[F]
+			if Forgotten is not None:	
+				Folds.popleft()
+				for (Fold, R) in zip(Folds, Past):
+					(w, k) = self.weight(F, R, Forgotten)
+					Fold[1] -= k * Fold[0] / w	# Forgotten's update was the first one
+					Fold[0] /= w
+			for (Fold, R) in zip(Folds, Past):
+				(w, k) = self.weight(F, R, Record)
+				(Fold[0], Fold[1]) = (Fold[0] * w, Fold[1] * w + k)
+			Folds.append(self.fold(F, Record, Past))
+		self.FoldVersion = self.Scores.Version
+		
 	def bestFeatureRecord(self, Feature):
-		"""	Alternative to bestRecord that aggregates similar feature values
+		"""	Alternative to bestRecord that aggregates similar feature values:
+			each record's performance is successively updated by all records' performances, 
+			depending on feature distance (see weight). 
+			Updates are maintained by 'remember', so that this query is a single pass
+			over memory (O(MemorySpan)) instead of comparing all pairs of records.
 		"""
 		if len(self.Scores) == 0:	return None
+		if self.FoldVersion != self.Scores.Version:	self.refold()
 		Best = dict() 
-		for i, (B1, Perf1) in enumerate(self.Scores.retrieve()):
-			for j, (B2, Perf2) in enumerate(self.Scores.retrieve()):
-				# if j >= i:	break	# symmetry
-				dist= abs(B1[Feature] - B2[Feature]) / (0.001 + self.LearningSimilarity)
-				# ------ updating Perf1 through weighted sum depending on distance
-				Perf1 = (Perf1 + Perf2 / (1 + dist)) * (1 + dist)/(2 + dist)
-			Best[B1[Feature]] = Perf1
+		for ((B1, Perf1), (A, B)) in zip(self.Scores.retrieve(), self.Folds[Feature]):
+			Best[B1[Feature]] = A * Perf1 + B
 		BestFeatureValue = max(Best, key=Best.get)	# return key with max value
 		if self.OptOut and Best[BestFeatureValue] < 0:	
 			# ====== all performances are negative - return (probably yet unexplored) zero value for the feaure
@@ -197,7 +257,6 @@ class Learner:
 		except (TypeError, IndexError):	Best = self.Features[Feature]
 		Target = self.Limitate(Gbl.Perturbate(Best, Speed), Bottom, Top)
 		return round(Gbl.Closer(Target, self.feature(Feature), self.Conservatism), 2)	# Target closer to old value if conservativm
-		
 
 	def Learns(self, neighbours=None, Speed=None, hot=False, BottomValue=0, TopValue=100):
 		""" Learns by randomly changing current value.
@@ -211,7 +270,7 @@ class Learner:
 		Performance = 0
 		if len(self.Performance): Performance = float(sum(self.Performance)) / len(self.Performance)
 		self.Performance = []	# resetting performance
-		self.Scores.push((self.Features.copy(), Performance))	# storing current performance
+		self.remember((self.Features.copy(), Performance))	# storing current performance
 		if self.Age == 1:	return False	# Newborn, no learning
 
 		# (1) imitation
@@ -225,7 +284,7 @@ class Learner:
 		if hot and not self.adult():	# still a kid
 			LearningSpeed = Gbl.Decrease(self.Age, self.Infancy, Speed)
 		else:	LearningSpeed = Speed
-		if random() < self.JumpProbability / 100.0:	LearningSpeed = TopValue	# max exploration from time to time
+		if rnd().random() < self.JumpProbability / 100.0:	LearningSpeed = TopValue	# max exploration from time to time
 		# compromise between current value and a perturbation of past best value
 		for F in FeatureNames:
 			# Pr = (F == 'Signal' and self.feature(F) == 0)	################################
@@ -40,7 +40,9 @@ if __name__ == '__main__':  sys.path.append('../..')
 import functools 
 from collections import OrderedDict
 from time import strftime
-from Evolife.Tools.Tools import transpose, error
+from Evolife.Tools.Tools import transpose, error, ErrorContext, fileState, reopenFile
+
+QUANTILES = (10, 25, 50, 75, 90)	# percentiles estimated from histograms
 
 
 
@@ -199,9 +201,50 @@ class Storage:
 			'\n' + self.Name + \
 			'.\tAvg:\t' + ' -- '.join(["%.2f" % x for x in self.average])
 
+def histogram_quantiles(Histogram, Low=0, High=100, Percentiles=QUANTILES):
+	"""	estimates percentiles from bin counts, assuming uniform distribution within bins
+	"""
+	Total = sum(Histogram)
+	if Total == 0:	return [None] * len(Percentiles)
+	Width = (High - Low) / len(Histogram)
+	Quantiles = []
+	for P in Percentiles:
+		Target = Total * P / 100.0
+		Cumul = 0
+		for (Bin, Count) in enumerate(Histogram):
+			if Count and Cumul + Count >= Target:
+				Quantiles.append(Low + Width * (Bin + (Target - Cumul) / Count))
+				break
+			Cumul += Count
+		else:	Quantiles.append(High)
+	return Quantiles
+
 class NumericStorage(Storage):
 	"""	Storage + basic statistics 
+		If Bins > 0, a histogram of each coordinate over [Low, High] is filled as vectors arrive
 	"""
+	def __init__(self, Name, Bins=0, Low=0, High=100):
+		self.Bins = Bins
+		self.Low = Low
+		self.High = High
+		Storage.__init__(self, Name)
+
+	def reset(self, length = -1):
+		"""	also empties histograms
+		"""
+		Storage.reset(self, length)
+		self.histograms = []	# one list of bin counts per coordinate
+
+	def store(self, vector):
+		"""	stores vector and counts its coordinates in histograms
+		"""
+		Storage.store(self, vector)
+		if self.Bins:
+			if not self.histograms:	self.histograms = [[0] * self.Bins for x in vector]
+			Width = (self.High - self.Low) / self.Bins
+			for (Histogram, x) in zip(self.histograms, vector):
+				Histogram[min(self.Bins - 1, max(0, int((x - self.Low) / Width)))] += 1
+
 	def statistics(self):
 		"""	computes best and average
 		"""
@@ -227,6 +270,12 @@ class Examiner:
 		"""
 		self.Name = Name
 		self.storages = dict()
+		self.distributions = dict()	# slots for which histograms are computed
+
+	def distribution(self, StorageName, Bins, Low=0, High=100):
+		"""	declares that numeric slot StorageName will keep histograms (Bins bins between Low and High)
+		"""
+		if Bins:	self.distributions[StorageName] = (Bins, Low, High)
 
 	def reset(self, length=-1):
 		"""	resets all storages
@@ -246,7 +295,7 @@ class Examiner:
 		if StorageName not in self.storages:
 			# creating a new slot
 			if Numeric:
-				self.storages[StorageName] = NumericStorage(StorageName)
+				self.storages[StorageName] = NumericStorage(StorageName, *self.distributions.get(StorageName, ()))
 			else:
 				self.storages[StorageName] = Storage(StorageName)
 			self.storages[StorageName].open_()
@@ -299,6 +348,7 @@ class Meta_Examiner(Storage):
 			and stores them as a dictionary of tuples (a tuple per slot)
 			(number_of_instances, best_of_each_coordinate,
 			 average_of_each_coordinate, list_of_instances) 
+			Histograms, if any, are summed and converted into quantiles
 		"""
 		# one takes the first examiner as representative
 		for Slot in self.storage[0].storages:
@@ -322,6 +372,12 @@ class Meta_Examiner(Storage):
 									  'data':	functools.reduce(lambda x,y: x+y, 
 													 tuple(tuple(Exam.storages[Slot].storage 
 														  for Exam in self.storage)))}
+			Storages = [Exam.storages[Slot] for Exam in self.storage if getattr(Exam.storages[Slot], 'histograms', None)]
+			if Storages:
+				Histograms = [list(map(sum, zip(*H))) for H in zip(*[S.histograms for S in Storages])]
+				self.Statistics[Slot]['histograms'] = Histograms
+				self.Statistics[Slot]['quantiles'] = [histogram_quantiles(H, Storages[0].Low, Storages[0].High) 
+														for H in Histograms]
 		return self.Statistics
 
 	def getData(self, Slot):	
@@ -353,9 +409,12 @@ class Generic_Observer:
 		self.recordInfo('ResultOffset', 0)  # minimum x-value when computing curve average  
 		self.TextErase()
 		self.Curves = Curves()	# stores curve legends 
-		self.Field_buffer = self.Field_grid()
-		self.Trajectory_buffer = self.Trajectory_grid()
+		# ====== display buffers are append-only lists, swapped when consumed
+		self.Field_buffer = list(self.Field_grid())
+		self.Trajectory_buffer = list(self.Trajectory_grid())
 		self.Genomes_buffer = []
+		self.Delta = False	# if True, only changed agent positions are sent to Field and Trajectories
+		self.Sent = {'Field': dict(), 'Trajectories': dict()}	# last positions sent, per agent
 		
 	def DisplayPeriod(self, Per=0):
 		"""	sets or retrieves display period
@@ -363,11 +422,20 @@ class Generic_Observer:
 		if Per:	self.DispPeriod = Per
 		return self.DispPeriod
 
+	def DeltaEncoding(self, Flag=None):
+		"""	sets or retrieves delta-encoding mode:
+			agents' positions are sent for display only if they changed.
+			Only suitable for 'Region' (ongoing) display, in which absent agents are not erased.
+		"""
+		if Flag is not None:	self.Delta = Flag
+		return self.Delta
+
 	def season(self, year=None):
 		"""	increments StepId
 		"""
 		if year is not None:	self.StepId = year
 		else:	self.StepId += 1
+		ErrorContext['Year'] = self.StepId	# for error logs
 		return self.StepId
 		
 	def currentYear(self): return self.StepId
@@ -443,14 +511,34 @@ class Generic_Observer:
 		"""	stores current position changes into the Window's buffer ('Field' by default, could be 'Trajectories')
 			'Position' can also be the string "erase"
 		"""
-		if isinstance(Position, list):	Buffer = list(Position)
+		if isinstance(Position, list):	Buffer = Position
 		elif isinstance(Position, tuple):	Buffer = [Position]
 		elif Position.lower() == 'erase':	Buffer = ['erase']	# order to erase the window
 		else:	error('Observer', "Should be 'erase' or tuple or list: " + str(Position))
-		Keep = not Reset
-		if Window == 'Field':			self.Field_buffer = Keep * self.Field_buffer + Buffer
-		elif Window == 'Trajectories':	self.Trajectory_buffer = Keep * self.Trajectory_buffer + Buffer
-		elif Window == 'Genomes':		self.Genomes_buffer = Keep * self.Genomes_buffer + Buffer
+		BufferName = {'Field': 'Field_buffer', 'Trajectories': 'Trajectory_buffer', 'Genomes': 'Genomes_buffer'}.get(Window)
+		if BufferName is None:	return
+		if Reset:	setattr(self, BufferName, list(Buffer))	# new buffer
+		else:		getattr(self, BufferName).extend(Buffer)	# no copy of previous content
+
+	def delta(self, Buffer, Window):
+		"""	keeps only agents' positions that changed since they were last sent to Window.
+			Several moves of the same agent are reduced to the last one.
+			Mere drawing instructions are kept.
+		"""
+		Sent = self.Sent[Window]
+		Frame = []
+		Latest = dict()	# last position of each agent in Buffer
+		for Item in Buffer:
+			if isinstance(Item, tuple) and len(Item) == 2 and isinstance(Item[1], tuple):
+				Latest[Item[0]] = Item[1]
+			else:
+				if Item == 'erase':	Sent.clear()
+				Frame.append(Item)
+		for (Agent, Position) in Latest.items():
+			if Sent.get(Agent) != Position:
+				Sent[Agent] = Position
+				Frame.append((Agent, Position))
+		return Frame
 
 	# initial drawings
 	def Field_grid(self):
@@ -470,12 +558,16 @@ class Generic_Observer:
 		if Slot in ['Positions', 'Field']:
 			# emptying Field_buffer 
 			CC = self.Field_buffer
-			if Consumption:	self.Field_buffer = []
+			if Consumption:	
+				self.Field_buffer = []
+				if self.Delta:	CC = self.delta(CC, 'Field')
 			return tuple(CC)
 		elif Slot == 'Trajectories':
 			# emptying Trajectory_buffer
 			CC = self.Trajectory_buffer
-			if Consumption:	self.Trajectory_buffer = []
+			if Consumption:	
+				self.Trajectory_buffer = []
+				if self.Delta:	CC = self.delta(CC, 'Trajectories')
 			if CC:	return tuple(CC)
 			return self.getInfo(Slot)	# retro-compatibility
 		elif Slot == 'DNA':
@@ -490,6 +582,12 @@ class Generic_Observer:
 		"""
 		self.PreviousStep = self.StepId # to ensure that it answers once a year 
 
+	def closeFiles(self):
+		"""	Closes files kept open by the observer (called at the end of the simulation)
+			To be overloaded
+		"""
+		pass
+
 	def TextErase(self):
 		"""	Erases the text buffer
 		"""
@@ -562,6 +660,22 @@ class Experiment_Observer(Generic_Observer):
 		if type(CurveOffset) == str and CurveOffset.strip().endswith('%'):	# Offset expressed in % of TimeLimit
 			CurveOffset = (self.TimeLimit * int(CurveOffset.strip('%'))) // 100
 		self.recordInfo('ResultOffset', CurveOffset)  	# to ignore transitory regime in curves
+		# ====== in batch mode, curve values may be written to the result file every ResultFlushPeriod steps (0: at the end)
+		self.recordInfo('ResultFlushPeriod', self.Parameter('ResultFlushPeriod', Default=0))
+		# ====== in batch mode, observation snapshots may be processed by a separate thread through a bounded queue
+		# ====== (curves and result files only: statistics are still computed by the simulation step)
+		# ====== with 'drop' backpressure, lost snapshots are counted in column 'DroppedSnapshots' of the '_res' file
+		self.recordInfo('ObserverQueue', self.Parameter('ObserverQueue', Default=0))	# 0: no observation thread
+		self.recordInfo('ObserverBackpressure', self.Parameter('ObserverBackpressure', Default='block'))	# 'block' or 'drop'
+		# ====== in batch mode, steps run in the calling thread, unless a StopFile is given (e.g. 'stop'):
+		# ====== the simulation then runs in a separate thread and stops when that file appears
+		self.recordInfo('StopFile', self.Parameter('StopFile', Default=''))
+		self.recordInfo('StopCheckPeriod', self.Parameter('StopCheckPeriod', Default=0.5))	# in seconds
+		# ====== in batch mode, the whole simulation is saved every CheckpointPeriod steps (0: never)
+		# ====== into CheckpointFile (default: <ResultFile>.ckpt) and may be resumed from file 'Resume'
+		self.recordInfo('CheckpointPeriod', self.Parameter('CheckpointPeriod', Default=0))
+		self.recordInfo('CheckpointFile', self.Parameter('CheckpointFile', Default=''))
+		self.recordInfo('Resume', self.Parameter('Resume', Default=''))
 		self.BatchMode = self.Parameter('BatchMode', Default=0)
 		if self.BatchMode:
 			machine = socket.gethostname().split('.')[0]
@@ -581,6 +695,9 @@ class Experiment_Observer(Generic_Observer):
 		Header += self.getInfo('ExperienceID') + ';'
 		Header += ';'.join([str(self.Parameter(P, Silent=True))
 									  for P in self.ParamSet.RelevantParamNames()]) + ';'
+		if self.getInfo('DroppedSnapshots') is not None:	# observation snapshots lost in 'drop' mode
+			(Names, Values) = Header.split('\n')
+			Header = f"{Names}DroppedSnapshots;\n{Values}{self.getInfo('DroppedSnapshots')};"
 		return Header
 		
 	# def getInfo(self, Slot, *p, **pp):
@@ -654,6 +771,39 @@ class EvolifeObserver(Observer):
 				elif Name in self.Scenario.phenemap():		
 					Legend = f'Average value of phene {Name} in the population'
 			self.curve(Name=Name, Color=Colour, Legend=Legend, Thickness=Thickness, Amplification=Amplification)
+		self.DistributionFile = None	# gene histograms and quantiles, one line per gene and per observed year
+
+	def __getstate__(self):
+		"""	for checkpoints: the distribution file is described by its name and current size
+		"""
+		State = self.__dict__.copy()
+		State['DistributionFile'] = fileState(self.DistributionFile)
+		return State
+
+	def __setstate__(self, State):
+		self.__dict__.update(State)
+		self.DistributionFile = reopenFile(State['DistributionFile'])
+
+	def recordDistributions(self):
+		"""	appends current gene histograms and quantiles to file ResultFile_dist.csv
+		"""
+		Histograms = self.Statistics.get('Genomes', dict()).get('histograms')
+		if not Histograms or not self.getInfo('ResultFile'):	return
+		if self.DistributionFile is None:
+			self.DistributionFile = open(self.getInfo('ResultFile') + '_dist.csv', 'w')
+			self.DistributionFile.write('Year;Gene;' + ';'.join([f'Q{P}' for P in QUANTILES]) + ';' 
+										+ ';'.join([f'B{B}' for B in range(len(Histograms[0]))]) + '\n')
+		for (Gene, Histogram, Quantiles) in zip(self.Scenario.get_gene_names(), Histograms, self.Statistics['Genomes']['quantiles']):
+			self.DistributionFile.write(f'{self.StepId};{Gene};' + ';'.join(['' if Q is None else '%.2f' % Q for Q in Quantiles]) + ';'
+										+ ';'.join(map(str, Histogram)) + '\n')
+		self.DistributionFile.flush()
+
+	def closeFiles(self):
+		"""	Closes the distribution file
+		"""
+		if self.DistributionFile is not None:
+			self.DistributionFile.close()
+			self.DistributionFile = None
 
 	def GetPlotOrders(self):
 		""" Gets the curves to be displayed from the scenario and
@@ -682,6 +832,7 @@ class EvolifeObserver(Observer):
 					value = 0
 			# ====== storing value in Curve
 			self.curve(Curve, value)
+		self.recordDistributions()
 		return super().GetPlotOrders()	# retrieves curves' current values
 
 	def getInfo(self, Slot, default=None):
@@ -22,8 +22,8 @@ if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
 
 
-import random
 from Evolife.Tools.Tools import error
+from Evolife.Tools import RandomStreams
 
 
 
@@ -34,10 +34,11 @@ class Phene:
 
 	def __init__(self, Name, FlagRandom=True):
 		"""	creates a zero-valued or a random characteristics, depending on FlagRandom 
+			(random values are drawn from stream 'Phenotype', see RandomStreams)
 		"""
 		self.Name = Name
 		if FlagRandom:
-			self.__value = random.randint(0, Phene.MaxPheneValue)
+			self.__value = RandomStreams.stream('Phenotype').randint(0, Phene.MaxPheneValue)
 		else:
 			self.__value = 0
 
@@ -25,10 +25,10 @@ if __name__ == '__main__':  # for tests
 	from Evolife.Scenarii.MyScenario import InstantiateScenario
 	InstantiateScenario('Cooperation','../Evolife')
 
-from random import randint, choice
-
 from Evolife.Tools.Tools import error
+from Evolife.Tools import RandomStreams
 from Evolife.Ecology.Group import Group, EvolifeGroup			 # definition of groups
+from Evolife.Social.Alliances import SocialGraph		# population-level store of social links
 
 class Population:	
 	"""	List of Groups
@@ -45,6 +45,8 @@ class Population:
 		self.year = -1		   # to keep track of time
 		self.Observer = Observer # contains instantaneous data for statistics and display
 		self.best_score = 0
+		# ====== optional store of the social links of the whole population, shared by groups
+		self.Network = SocialGraph() if self.Scenario.Parameter('SocialGraph', Default=0) else None
 		nb_groups = self.Scenario.Parameter('NumberOfGroups', Default=1)
 		group_size = self.popSize // nb_groups
 		self.groupMaxSize = 2 * group_size	# groups beyond that size split
@@ -56,18 +58,19 @@ class Population:
 	def createGroup(self, ID=0, Size=0):
 		"""	Calls class 'Group' 
 		"""
-		return Group(self.Scenario, ID=ID, Size=Size)
+		return Group(self.Scenario, ID=ID, Size=Size, Network=self.Network)
 		
 	def selectIndividual(self):
 		"""	random selection of an individual in the population 
 		"""
-		(group, winner) = self.lottery()
+		(group, winner) = self.lottery(RandomStreams.stream('Population', 'Selection'))
 		return group.whoIs(winner)
 		
-	def lottery(self):
+	def lottery(self, Rnd=None):
 		"""	random selection of an individual by number in the population 
+			Rnd: random generator (default: stream 'Population_Lottery', see RandomStreams)
 		"""
-		winner = randint(0,self.popSize-1)
+		winner = (Rnd or RandomStreams.stream('Population', 'Lottery')).randint(0,self.popSize-1)
 		for gr in self.groups:
 			if gr.size > winner:	return (gr,winner)
 			else:	winner -= gr.size
@@ -87,8 +90,8 @@ class Population:
 			return	# no migration if only one group
 		migrants = int(self.Scenario.Parameter('MigrationRate') * self.popSize/100.0 + 0.5)
 		while migrants:
-			(gr_out, migrant) = self.lottery() # choosing the migrant
-			(gr_in,dummy) = self.lottery()	# choosing where to go
+			(gr_out, migrant) = self.lottery(RandomStreams.stream('Population', 'Migration')) # choosing the migrant
+			(gr_in,dummy) = self.lottery(RandomStreams.stream('Population', 'Migration'))	# choosing where to go
 			gr_in.receive(gr_out.remove_(migrant))  # symbolically murdered, and then born-again
 			migrants -= 1
 
@@ -105,7 +108,7 @@ class Population:
 				effectif = int(gr.size/2.0 + .5)
 				newgroup = self.createGroup(ID=len(self.groups)+1)		# create empty group
 				while effectif:
-					newgroup.receive(gr.remove_(randint(0,gr.size-1)))   # symbolically murdered, and then born-again
+					newgroup.receive(gr.remove_(RandomStreams.stream('Population', 'Splitting').randint(0,gr.size-1)))   # symbolically murdered, and then born-again
 					effectif -= 1
 				newgroup.update_()
 				self.groups.append(newgroup)
@@ -122,7 +125,7 @@ class Population:
 				# for dummy in gr.members:
 				for dummy in list(gr):
 					try:
-						gr_in = choice(self.groups) # dispersed members join groups independently of their size
+						gr_in = RandomStreams.stream('Population', 'Splitting').choice(self.groups) # dispersed members join groups independently of their size
 					except IndexError:
 						return  # dying population 
 ##					(gr_in,dummy) = self.lottery() # choosing where to go
@@ -135,7 +138,7 @@ class Population:
 		##		MaxLives =  self.Scenario.Parameter('SelectionPressure')
 		self.update()
 		while self.popSize > self.Scenario.Parameter('PopulationSize'):
-			(gr, Unfortunate) = self.lottery()
+			(gr, Unfortunate) = self.lottery(RandomStreams.stream('Population', 'Limit'))
 			if gr.kill(Unfortunate) is not None:
 				self.popSize -= 1
 		self.update(display=True)
@@ -239,7 +242,7 @@ class EvolifePopulation(Population):
 	def createGroup(self, ID=0, Size=0):
 		"""	This version of 'createGroup' calls the 'EvolifeGroup' class instead of the 'Group' class 
 		"""
-		return EvolifeGroup(self.Scenario, ID=ID, Size=Size)
+		return EvolifeGroup(self.Scenario, ID=ID, Size=Size, Network=self.Network)
 		
 	def reproduction(self):
 		"""	launches reproduction in groups 
@@ -25,25 +25,32 @@ if __name__ == '__main__':
 	from Evolife.Scenarii.MyScenario import InstantiateScenario
 	InstantiateScenario('Cooperation','../Evolife')
 
-import random
 # try:	import numpy; NUMPY = True; print('Loading Numpy')
 # except ImportError:	NUMPY = False
 NUMPY=False	# slower with Numpy !!
 
 from Evolife.Tools import Tools
+from Evolife.Tools import RandomStreams
 
 class DNA:
 	"""   class DNA: individuals' 'DNA' defined as a string of bits
 	"""
 
-	def __init__(self, Scenario, Nb_nucleotides):
+	def __init__(self, Scenario, Nb_nucleotides, Rnd=None):
+		"""	Rnd: random generator for random filling (default: stream 'Genetics_Init', see RandomStreams)
+		"""
 		self.Scenario = Scenario
 		self.nb_nucleotides = Nb_nucleotides
 		self.__dna = []
-		Fill = self.Scenario.Parameter('DNAFill', Default=-1)	# 0 or 1 or -1=random
+		# ====== parameters read once, None meaning absent 
+		# ====== (frozen for this DNA: later parameter changes only affect new individuals)
+		self.DNAParams = Scenario.snapshot(Silent=('NbCrossover', 'MutationRate'), DNAFill=-1)
+		Fill = self.DNAParams.DNAFill	# 0 or 1 or -1=random
 		if (Fill==1):	self.__dna = [1] * self.nb_nucleotides
 		elif (Fill==0):	self.__dna = [0] * self.nb_nucleotides
-		else:			self.__dna = [random.choice([0,1]) for _ in range(self.nb_nucleotides)]
+		else:
+			Rnd = Rnd or RandomStreams.stream('Genetics', 'Init')
+			self.__dna = [Rnd.choice([0,1]) for _ in range(self.nb_nucleotides)]
 		if NUMPY:	self.__dna = numpy.array(self.__dna)	# doesn't seem to be very efficient !
 			
 	def DNAfill(self, Nucleotides):
@@ -55,13 +62,18 @@ class DNA:
 		if len(Nucleotides) > 0 and not set(Nucleotides) <= set([0,1]):
 			Tools.error('DNA: initialization','Provided genome is not binary')
 		
-	def hybrid(self, mother, father, number_crossover = -1):
+	def hybrid(self, mother, father, number_crossover = -1, Rnd=None):
 		"""	builds the child's DNA from the parents' DNA 
+			Rnd: random generator (default: stream 'Genetics_Crossover')
 		"""
+		Rnd = Rnd or RandomStreams.stream('Genetics', 'Crossover')
 		#   computing random crossover points
-		if number_crossover < 0:	number_crossover = self.Scenario.Parameter('NbCrossover')
+		if number_crossover < 0:	
+			number_crossover = self.DNAParams.NbCrossover
+			if number_crossover is None:	number_crossover = self.Scenario.Parameter('NbCrossover')	# error
+			self.Scenario.used('NbCrossover')
 		if self.nb_nucleotides > 1:
-			Loci_crossover = random.sample(range(1,self.nb_nucleotides), number_crossover)
+			Loci_crossover = Rnd.sample(range(1,self.nb_nucleotides), number_crossover)
 			Loci_crossover = [0] + sorted(Loci_crossover)
 		else:
 			Loci_crossover = [0]
@@ -70,7 +82,7 @@ class DNA:
 		# the child's DNA will be read alternatively from parent1 and parent2
 		parent1 = mother.__dna
 		parent2 = father.__dna
-		if random.randint(0,1):	# starting indifferently from mother or father
+		if Rnd.randint(0,1):	# starting indifferently from mother or father
 			parent1, parent2 = parent2, parent1	 # swapping parents
 		self.__dna = []
 		for cut_point in range(len(Loci_crossover)-1):
@@ -78,17 +90,22 @@ class DNA:
 			parent1, parent2 = parent2, parent1	 # swapping parents		
 		if NUMPY:	self.__dna = numpy.array(self.__dna)
 
-	def mutate(self, mutation_rate = -1):
+	def mutate(self, mutation_rate = -1, Rnd=None):
 		"""	computing the expected number of mutations 
+			Rnd: random generator (default: stream 'Genetics_Mutation')
 		"""
-		if mutation_rate < 0:	mutation_rate = self.Scenario.Parameter('MutationRate')
-		mutation_number = Tools.chances(mutation_rate/1000.0, self.nb_nucleotides)
+		Rnd = Rnd or RandomStreams.stream('Genetics', 'Mutation')
+		if mutation_rate < 0:	
+			mutation_rate = self.DNAParams.MutationRate
+			if mutation_rate is None:	mutation_rate = self.Scenario.Parameter('MutationRate')	# error
+			self.Scenario.used('MutationRate')
+		mutation_number = Tools.chances(mutation_rate/1000.0, self.nb_nucleotides, Rnd=Rnd)
 ##        mutation_number =  (mutation_rate * self.nb_nucleotides) / 1000
 ##        if randint(1,1000) < 1 + ((mutation_rate * self.nb_nucleotides) % 1000) :
 ##            mutation_number += 1
 		# performing mutations
 		for mutation in range(mutation_number):
-			pos = random.randint(0, self.nb_nucleotides - 1)
+			pos = Rnd.randint(0, self.nb_nucleotides - 1)
 			self.__dna[pos] = 1 - self.__dna[pos]
 		return mutation_number
 
@@ -22,9 +22,12 @@
 import sys
 if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
+import os
 import re
+from array import array
+from bisect import bisect_left
 from functools import reduce
-from Evolife.Tools.Tools import transpose, error
+from Evolife.Tools.Tools import transpose, error, warning, fileState, reopenFile
 
 
 ##################################################
@@ -172,7 +175,9 @@ class Stroke:
 # Curve: stores points to display a curve        #
 ##################################################
 class Curve:
-	""" Holds a complete (continuous) curve in memory
+	""" Holds a complete (continuous) curve in memory.
+		Coordinates are stored in typed arrays (one for x, one for y)
+		with running sums of y, so that averages do not require rescanning.
 	"""
 	def __init__(self, colour, ID, ColName=None, Legend=None):
 		"""	creation of a curve.
@@ -199,9 +204,17 @@ class Curve:
 		""" A curve is a list of successive connected positions + a list of dicontinuities 
 		"""
 		self.CurrentPosition = 0   # Current position for reading
-		self.positions = [StartPos] # Stores successive points
+		self.X = array('d')	# x-coordinates of successive points
+		self.Y = array('d')	# y-coordinates of successive points
+		self.CumY = array('d')	# running sums of y-coordinates (CumY[i] = Y[0] + ... + Y[i])
+		self.Extra = dict()	# additional coordinates (e.g. (x, y1, y2) to hatch an area), indexed by position
+		self.IntX = True	# integer x-coordinates are given back as integers
+		self.IntY = bytearray()	# flags: y-coordinates given as integers are given back as integers
+		self.Sorted = True	# True as long as x-coordinates are increasing
+		self.Views = dict()	# cache of downsampled views
 		self.discontinuities = []
 		self.currentDiscontinuity = 0	# to accelerate reading
+		self.add(StartPos)
 
 	def name(self, N = ""):
 		"""	sets the curve's name 
@@ -215,10 +228,26 @@ class Curve:
 		if L:	self.Legend = L
 		return self.Legend
 		
+	def point(self, Index):
+		"""	returns the position stored at Index as a tuple
+		"""
+		x, y = self.X[Index], self.Y[Index]
+		if self.IntX:	x = int(x)
+		if self.IntY[Index]:	y = int(y)
+		if self.Extra and Index % len(self.X) in self.Extra:
+			return (x, y) + self.Extra[Index % len(self.X)]
+		return (x, y)
+
+	@property
+	def positions(self):
+		"""	list of successive points (rebuilt from coordinate arrays - for compatibility)
+		"""
+		return [self.point(i) for i in range(len(self.X))]
+
 	def last(self):
 		"""	returns the last position in the curve 
 		"""
-		return self.positions[-1]
+		return self.point(-1)
 
 	def add(self, Pos, Draw=True):
 		""" Adds a new position to the curve.
@@ -227,36 +256,116 @@ class Curve:
 		# print('adding %s to %s (draw=%s)' % (str(Pos), self.ColName, Draw))
 		if not Draw:
 			self.discontinuities.append(self.length())
-		self.positions.append(Pos)
+		(x, y) = Pos[:2]
+		if self.X and x < self.X[-1]:	self.Sorted = False
+		self.IntX = self.IntX and isinstance(x, int)
+		self.IntY.append(isinstance(y, int))
+		if len(Pos) > 2:	self.Extra[len(self.X)] = tuple(Pos[2:])
+		self.X.append(x)
+		self.Y.append(y)
+		self.CumY.append(y + (self.CumY[-1] if self.CumY else 0))
 		# print(self.Name, Pos)
 
 	def length(self):
-		return len(self.positions)
+		return len(self.X)
 	
 	def X_coord(self):
 		"""	list of x-coordinates 
 		"""
-		return tuple(map(lambda P: P[0], self.positions))
+		if self.IntX:	return tuple(map(int, self.X))
+		return tuple(self.X)
 		
 	def Y_coord(self):
 		"""	list of y-coordinates 
 		"""
-		return tuple(map(lambda P: round(P[1],3), self.positions))
+		return tuple(int(y) if IntY else round(y,3) for (y, IntY) in zip(self.Y, self.IntY))
 
 	def Avg(self, start=0):
 		"""	compute average value of Y_coord 
+			(for points with x-coordinate larger than start)
 		"""
-		#ValidValues = [Y for Y in self.Y_coord()[start:] if Y >= 0]
-		# try:	ValidValues = [P[1] for P in self.positions if P[0] >= start and P[1] >= 0]
-		try:	ValidValues = [P[1] for P in self.positions if P[0] >= start]
-		except TypeError:
-			print(start, self.positions)
+		if self.Sorted:
+			# ====== running sums: average computed in constant time
+			First = bisect_left(self.X, start)
+			if First >= len(self.X):	return 0
+			Total = self.CumY[-1] - (self.CumY[First-1] if First else 0)
+			return Total / (len(self.X) - First)
+		ValidValues = [y for (x, y) in zip(self.X, self.Y) if x >= start]
 		if len(ValidValues) > 0:
-			# return int(round(float(sum(ValidValues)) / len(ValidValues)))
 			return float(sum(ValidValues)) / len(ValidValues)
 		else:
 			return 0
 
+	def view(self, MaxPoints=1000, Method='minmax'):
+		"""	returns a downsampled version of the curve (list of points) for display.
+			Full resolution data remain available (e.g. for 'dump').
+			Method is 'minmax' (minimum and maximum of each bucket are kept)
+			or 'lttb' (Largest Triangle Three Buckets: one representative point per bucket).
+			Views are cached until the curve grows.
+		"""
+		N = len(self.X)
+		if N <= MaxPoints or MaxPoints < 3:	return self.positions
+		Key = (MaxPoints, Method)
+		if Key in self.Views and self.Views[Key][0] == N:	return self.Views[Key][1]
+		if Method == 'lttb':	View = self._lttb(MaxPoints)
+		elif Method == 'minmax':	View = self._minmax(MaxPoints)
+		else:	error('Curves', f'unknown downsampling method: {Method}')
+		self.Views[Key] = (N, View)
+		return View
+
+	def _minmax(self, MaxPoints):
+		"""	keeps the lowest and highest points of each bucket, in x order
+		"""
+		N = len(self.X)
+		NbBuckets = max(1, (MaxPoints - 2) // 2)
+		BucketSize = (N - 2) / NbBuckets
+		Indices = [0]
+		for b in range(NbBuckets):
+			Start = 1 + int(b * BucketSize)
+			End = min(N - 1, 1 + int((b + 1) * BucketSize))
+			if Start >= End:	continue
+			Bucket = range(Start, End)
+			Lowest = min(Bucket, key=self.Y.__getitem__)
+			Highest = max(Bucket, key=self.Y.__getitem__)
+			Indices += sorted(set((Lowest, Highest)))
+		Indices.append(N - 1)
+		return [self.point(i) for i in Indices]
+
+	def _lttb(self, MaxPoints):
+		"""	Largest Triangle Three Buckets: in each bucket, keeps the point
+			that forms the largest triangle with the previously kept point
+			and with the average of the next bucket
+		"""
+		N = len(self.X)
+		X, Y = self.X, self.Y
+		BucketSize = (N - 2) / (MaxPoints - 2)
+		Indices = [0]
+		a = 0	# last selected point
+		for b in range(MaxPoints - 2):
+			Start = 1 + int(b * BucketSize)
+			End = min(N - 1, 1 + int((b + 1) * BucketSize))
+			# ====== average point of next bucket
+			NextStart, NextEnd = End, min(N, 1 + int((b + 2) * BucketSize))
+			if NextEnd > NextStart:
+				AvgX = sum(X[NextStart:NextEnd]) / (NextEnd - NextStart)
+				AvgY = (self.CumY[NextEnd-1] - self.CumY[NextStart-1]) / (NextEnd - NextStart)
+			else:	AvgX, AvgY = X[-1], Y[-1]
+			Area = lambda i: abs((X[a] - AvgX) * (Y[i] - Y[a]) - (X[a] - X[i]) * (AvgY - Y[a]))
+			a = max(range(Start, End), key=Area, default=a)
+			Indices.append(a)
+		Indices.append(N - 1)
+		return [self.point(i) for i in Indices]
+
+	def segments(self, MaxPoints=None, Method='minmax'):
+		"""	iterates over segments to be drawn.
+			Curves with no discontinuities are downsampled if they have more than MaxPoints points.
+		"""
+		if MaxPoints is None or self.discontinuities or self.length() <= MaxPoints:
+			for Segment in self:	yield Segment
+			return
+		View = self.view(MaxPoints, Method)
+		for i in range(1, len(View)):	yield (View[i-1], View[i])
+
 	def __iter__(self):
 		# defines the class as an iterator
 		return self
@@ -279,7 +388,7 @@ class Curve:
 			self.currentDiscontinuity = 0
 			raise StopIteration
 		self.CurrentPosition += 1
-		return (self.positions[self.CurrentPosition-1], self.positions[self.CurrentPosition])
+		return (self.point(self.CurrentPosition-1), self.point(self.CurrentPosition))
 			
 	def __str__(self):	return self.Name
 
@@ -374,7 +483,7 @@ class Curves:
 		else:
 			active_Curves = self.ActiveCurves()
 			Coords = reduce(lambda x,y: x+y, [P.positions for P in self.Curves
-											  if len(P.positions) > 1]) 
+											  if P.length() > 1]) 
 			
 		File_dump = open(ResultFileName + '.csv', 'w')
 		for C in Coords:
@@ -382,33 +491,157 @@ class Curves:
 			File_dump.write('\n')
 		File_dump.close()
 
-		# editing the header
-		if ResultHeader:
-			HeaderLines = ResultHeader.split('\n')
-			HeaderLines[0] += 'LastStep;'
-			# Writing Curve names sorted by colours at the end of the first line
-			if Legends:
-				HeaderLines[0] += ';'.join([P.legend().replace(' ', '_') for P in active_Curves])
-			else:
-				HeaderLines[0] += ';'.join([P.name() for P in active_Curves])
-			Header = '\n'.join(HeaderLines)
-		else: Header = ''
-
 		# storing average values
-		AvgStr = Header
-		try:	AvgStr += '%d;' % active_Curves[0].X_coord()[-1]	# storing actual max time value
-		except IndexError:	pass
-		AvgStr += ';'.join([f'{P.Avg(DumpStart):.2f}' for P in active_Curves])
-		AvgStr += '\n'
-		
-		Averages = open(ResultFileName + '_res.csv', 'w').write(AvgStr)
+		if Legends:	Names = [P.legend().replace(' ', '_') for P in active_Curves]
+		else:		Names = [P.name() for P in active_Curves]
+		try:	LastStep = active_Curves[0].X_coord()[-1]	# actual max time value
+		except IndexError:	LastStep = None
+		Averages = [P.Avg(DumpStart) for P in active_Curves]
+		open(ResultFileName + '_res.csv', 'w').write(ResultSummary(ResultHeader, Names, LastStep, Averages))
 		
 		# returning average values
 		ResultDict = dict()
-		try:	ResultDict['LastStep'] = str(active_Curves[0].X_coord()[-1])
-		except IndexError:	ResultDict['LastStep'] = 0
-		# for P in active_Curves:	ResultDict[P.name()] = str(P.Avg(DumpStart)) 
-		for P in active_Curves:	ResultDict[P.name()] = f'{P.Avg(DumpStart):.2f}'
+		ResultDict['LastStep'] = str(LastStep) if LastStep is not None else 0
+		for (P, Avg) in zip(active_Curves, Averages):	ResultDict[P.name()] = f'{Avg:.2f}'
+		return ResultDict
+			
+
+##################################################
+# Result files                                   #
+##################################################
+
+def ResultSummary(ResultHeader, Names, LastStep, Averages):
+	""" Content of the '_res' result file:
+		header (parameter names + curve names) and then
+		parameter values, last time step and curves' average values
+	"""
+	# editing the header
+	if ResultHeader:
+		HeaderLines = ResultHeader.split('\n')
+		HeaderLines[0] += 'LastStep;'
+		# Writing Curve names sorted by colours at the end of the first line
+		HeaderLines[0] += ';'.join(Names)
+		Header = '\n'.join(HeaderLines)
+	else: Header = ''
+	AvgStr = Header
+	if LastStep is not None:	AvgStr += '%d;' % LastStep	# storing actual max time value
+	AvgStr += ';'.join([f'{Avg:.2f}' for Avg in Averages])
+	AvgStr += '\n'
+	return AvgStr
+
+class ResultWriter:
+	""" Streams curve values into the result file while the simulation is running.
+		Rows are buffered and appended to the file every 'FlushPeriod' time steps,
+		so that partial results survive an interruption.
+		Average values (stored in the '_res' file) are computed from running sums,
+		so that curves need not be kept in memory.
+		Output is the same as Curves.dump's when curves share their x-coordinates.
+		Otherwise, Curves.dump writes curves one after the other, which cannot be done 
+		without keeping them: rows are then written with blanks for missing values.
+	"""
+	def __init__(self, ResultFileName, FlushPeriod=100, DumpStart=0, Legends=True):
+		"""	DumpStart = points below this x-value are ignored when computing average values
+		"""
+		self.ResultFileName = ResultFileName
+		self.FlushPeriod = max(1, FlushPeriod)
+		self.DumpStart = DumpStart
+		self.Legends = Legends
+		self.Columns = []	# curves written in the file, in column order
+		self.Index = dict()	# curve ID --> column number
+		self.Rows = []		# rows not yet written
+		self.Cums = []		# running sums of values, one per column (as Curve.CumY)
+		self.Before = []	# running sums before DumpStart
+		self.Counts = []	# number of values from DumpStart on
+		self.Aligned = True	# whether curves share x-coordinates
+		self.LastStep = None
+		self.LastFlush = None	# time step of last flush
+		self.File = None
+
+	def open_(self, ActiveCurves):
+		"""	Creates the result file with one column per curve.
+			Points already in curves (i.e. their starting point) are recorded first, as in Curves.dump
+		"""
+		self.Columns = list(ActiveCurves)
+		self.Index = dict([(P.ID, Col) for (Col, P) in enumerate(self.Columns)])
+		self.Cums = [0] * len(self.Columns)
+		self.Before = [0] * len(self.Columns)
+		self.Counts = [0] * len(self.Columns)
+		self.File = open(self.ResultFileName + '.csv', 'w')
+		self.File.write(';'.join(['Year'] + self.names()) + '\n')
+		self.record([(P.ID, Point) for P in self.Columns for Point in P.positions])
+
+	def __getstate__(self):
+		"""	for checkpoints: the result file is described by its name and current size
+		"""
+		State = self.__dict__.copy()
+		State['File'] = fileState(self.File)
+		return State
+
+	def __setstate__(self, State):
+		self.__dict__.update(State)
+		self.File = reopenFile(State['File'])
+
+	def names(self):
+		"""	column names (legends or curve names)
+		"""
+		if self.Legends:	return [P.legend().replace(' ', '_') for P in self.Columns]
+		return [P.name() for P in self.Columns]
+
+	def record(self, Points):
+		"""	Points is a list of (CurveId, (x, y)).
+			Values sharing the same x are stored on the same row.
+			Returns True when a flush is due.
+		"""
+		Rows = dict()
+		for (CurveId, Point) in Points:
+			if CurveId not in self.Index:	continue	# curve created after the file was opened
+			(x, y) = Point[:2]
+			Col = self.Index[CurveId]
+			Rows.setdefault(x, [''] * len(self.Columns))[Col] = y if isinstance(y, int) else round(y, 3)
+			# ====== same arithmetic as Curve.Avg, for identical averages
+			self.Cums[Col] = y + self.Cums[Col]
+			if x < self.DumpStart:	self.Before[Col] = self.Cums[Col]
+			else:	self.Counts[Col] += 1
+			if self.LastStep is None or x > self.LastStep:	self.LastStep = x
+		if self.Aligned and any('' in Row for Row in Rows.values()):
+			self.Aligned = False
+			warning('ResultWriter', f'curves do not share x-coordinates: {self.ResultFileName}.csv differs from a final dump')
+		self.Rows += [[x] + Row for (x, Row) in Rows.items()]
+		if self.LastStep is None:	return False
+		if self.LastFlush is None:	self.LastFlush = self.LastStep
+		return self.LastStep - self.LastFlush >= self.FlushPeriod
+
+	def averages(self):
+		"""	average values of curves, from DumpStart on
+		"""
+		return [(Cum - Before) / Count if Count else 0 for (Cum, Before, Count) in zip(self.Cums, self.Before, self.Counts)]
+
+	def flush(self, ResultHeader=None):
+		"""	Appends buffered rows to the result file.
+			If ResultHeader is provided, the '_res' file is updated as well
+		"""
+		if self.File is None:	return
+		self.File.write(''.join([';'.join(map(str, Row)) + '\n' for Row in self.Rows]))
+		self.File.flush()
+		self.Rows = []
+		self.LastFlush = self.LastStep
+		if ResultHeader is not None:
+			# ====== '_res' file is replaced atomically
+			ResFileName = self.ResultFileName + '_res.csv'
+			open(ResFileName + '.tmp', 'w').write(ResultSummary(ResultHeader, self.names(), self.LastStep, self.averages()))
+			os.replace(ResFileName + '.tmp', ResFileName)
+
+	def close(self, ResultHeader=''):
+		"""	Writes remaining rows and final average values.
+			Returns average values as a dict, as Curves.dump does
+		"""
+		if self.File is None:	return {}
+		self.flush(ResultHeader)
+		self.File.close()
+		self.File = None
+		ResultDict = dict()
+		ResultDict['LastStep'] = str(self.LastStep) if self.LastStep is not None else 0
+		for (P, Avg) in zip(self.Columns, self.averages()):	ResultDict[P.name()] = f'{Avg:.2f}'
 		return ResultDict
 			
 
@@ -21,14 +21,14 @@
 import os
 import os.path
 import sys
-
-from time import sleep
+import signal
 
 
 from Evolife.Graphics import Simulation_Thread		# Thread to run the simulation in parallel
 
-from Evolife.Tools.Tools import error
-from Evolife.Graphics.Curves import Curves, EvolifeColourID	# names of curves
+from Evolife.Tools.Tools import error, warning, saveState, loadState
+from Evolife.Tools import RandomStreams
+from Evolife.Graphics.Curves import Curves, ResultWriter, EvolifeColourID	# names of curves
 
 
 
@@ -53,6 +53,49 @@ class Evolife_Batch:
 		self.simulation = None  # name of the simulation thread
 		self.Obs = Obs  # simulation observer
 		self.OneStep = SimulationStep   # function that launches one step of the simulation
+		# ====== curve values may be streamed into the result file instead of being kept in memory
+		self.Writer = None
+		if Obs.getInfo('ResultFile') and Obs.getInfo('ResultFlushPeriod', 0):
+			self.Writer = ResultWriter(Obs.getInfo('ResultFile'), FlushPeriod=Obs.getInfo('ResultFlushPeriod'), 
+							DumpStart=Obs.getInfo('ResultOffset'), Legends=True)
+		# ====== observation snapshots may be processed by a separate thread
+		self.Observation = None
+		if Obs.getInfo('ObserverQueue', 0) > 0:
+			self.Observation = Simulation_Thread.Observation(self.Process_snapshot, QueueSize=Obs.getInfo('ObserverQueue'),
+							Backpressure=Obs.getInfo('ObserverBackpressure', 'block'))
+			self.Observation.start()
+			if self.Observation.Backpressure == 'drop':	self.recordDropped()	# column present in '_res' from the start
+		self.CheckpointPeriod = Obs.getInfo('CheckpointPeriod', 0)	# 0: no checkpoint
+
+	def checkpointFile(self):
+		return self.Obs.getInfo('CheckpointFile', '') or self.Obs.getInfo('ResultFile') + '.ckpt'
+
+	def checkpoint(self):
+		"""	Saves the whole simulation into the checkpoint file:
+			simulation step (and thus population, scenario and parameters), 
+			observer, curves, result file state and random streams
+		"""
+		if self.Observation is not None:	self.Observation.drain()	# curves are up to date
+		saveState({'OneStep': self.OneStep, 'Obs': self.Obs, 'Curves': self.Curves, 'Writer': self.Writer,
+				   'BestResult': self.BestResult, 'Random': RandomStreams.getstate()}, self.checkpointFile())
+
+	def restore(self, CheckpointFile):
+		"""	Resumes the simulation saved in CheckpointFile
+		"""
+		State = loadState(CheckpointFile)
+		self.OneStep = State['OneStep']
+		self.Obs = State['Obs']
+		self.Curves = State['Curves']
+		self.Writer = State['Writer']
+		self.BestResult = State['BestResult']
+		RandomStreams.setstate(State['Random'])
+		if self.Observation is not None:	self.Observation.Dropped = self.Obs.getInfo('DroppedSnapshots', 0)
+
+	def recordDropped(self):
+		"""	Stores the number of snapshots lost by the observation thread ('drop' backpressure),
+			so that it appears in the '_res' summary
+		"""
+		self.Obs.recordInfo('DroppedSnapshots', self.Observation.Dropped)
 
 
 	def Simulation_stop(self):
@@ -76,31 +119,73 @@ class Evolife_Batch:
 				error("Evolife_Batch","Inexistent buzy mode")
 		self.BestResult = Best
 		if self.Obs.Visible():
-			self.Process_graph_orders(Best)
+			if self.Observation is not None:	self.Observation.submit(self.snapshot())
+			else:	self.Process_graph_orders(Best)
 		if self.Obs.Over():
 			return -1	# Stops the simulation thread
-		else:
-			return 0
+		if self.CheckpointPeriod and self.Obs.StepId % self.CheckpointPeriod == 0:	self.checkpoint()
+		return 0
 					  
+	def snapshot(self):
+		"""	Immutable copy of what the observer has to say at the current step:
+			(year, plot orders, curve names, result header)
+		"""
+		if self.Observation is not None and self.Observation.Backpressure == 'drop':	self.recordDropped()
+		ResultHeader = self.Obs.getInfo('ResultHeader') if self.Writer is not None else None
+		return (self.Obs.StepId, tuple(self.Obs.getInfo('PlotOrders')), tuple(self.Obs.getInfo('CurveNames')), ResultHeader)
+
 	def Process_graph_orders(self, BestPhenotype):
 		"""	Retrieves plot orders from observer as a list of (CurveId, Point)
 			and add points to curves accordingly
 		"""
-		for CurveData in self.Obs.getInfo('PlotOrders'):
+		self.Process_snapshot(self.snapshot())
+
+	def Process_snapshot(self, Snapshot):
+		"""	Adds points to curves
+			(or sends them to the result file in streaming mode).
+			May be executed by the observation thread.
+		"""
+		(Year, PlotOrders, CurveNames, ResultHeader) = Snapshot
+		if self.Writer is not None:
+			self.Stream_graph_orders(PlotOrders, CurveNames, ResultHeader)
+			return
+		for CurveData in PlotOrders:
 			(CurveId, Point) = CurveData[:2]
 			try:
 				self.Curves.Curves[EvolifeColourID(CurveId)[0]].add(Point)
 			except IndexError:
 				error("Evolife_Batch: unknown curve ID")
 				
+	def Stream_graph_orders(self, PlotOrders, CurveNames, ResultHeader):
+		"""	Sends plot orders to the result file writer
+			which periodically appends them to the result file
+		"""
+		if self.Writer.File is None:
+			# ====== curves are known once the first plot orders have been issued
+			self.Curves.Curvenames(CurveNames)
+			self.Writer.open_(self.Curves.ActiveCurves())
+		if self.Writer.record([(EvolifeColourID(CurveData[0])[0], CurveData[1]) for CurveData in PlotOrders]):
+			self.Writer.flush(ResultHeader)
+
 	def Destruction(self, event=None): 
 		"""	Stops the simulation and dumps data into output file
 		"""
 		self.Simulation_stop()
-		x_values_ignored = self.Obs.getInfo('ResultOffset') # call first to make parameter 'relevant'
-		self.Curves.Curvenames(self.Obs.getInfo('CurveNames'))	# stores curve names - may have been updated	
-		self.Curves.dump(self.Obs.getInfo('ResultFile'), self.Obs.getInfo('ResultHeader'), 
-						DumpStart=x_values_ignored, Legends=True)
+		try:
+			if self.Observation is not None:	
+				self.Observation.stop()	# remaining snapshots are processed
+				if self.Observation.Backpressure == 'drop':	self.recordDropped()
+			x_values_ignored = self.Obs.getInfo('ResultOffset') # call first to make parameter 'relevant'
+			if self.Writer is not None:
+				self.Writer.close(self.Obs.getInfo('ResultHeader'))
+			else:
+				self.Curves.Curvenames(self.Obs.getInfo('CurveNames'))	# stores curve names - may have been updated	
+				self.Curves.dump(self.Obs.getInfo('ResultFile'), self.Obs.getInfo('ResultHeader'), 
+								DumpStart=x_values_ignored, Legends=True)
+		finally:	self.Obs.closeFiles()
+		if self.Observation is not None and self.Observation.Dropped:	# reported once results are saved
+			warning('Evolife_Batch', f'{self.Observation.Dropped} observation snapshots were dropped (queue full)',
+					DroppedSnapshots=self.Observation.Dropped)
 
 
 ##################################################
@@ -110,18 +195,43 @@ class Evolife_Batch:
 def Start(SimulationStep, Obs):
 	""" SimulationStep is a function that performs a simulation step
 		Obs is the observer that stores statistics
+		By default, steps are performed in the calling thread (an interruption from the keyboard
+		stops the simulation and results obtained so far are saved).
+		If Obs provides a 'StopFile' name, the simulation runs in a separate thread
+		and stops when that file appears (checked every 'StopCheckPeriod' seconds)
+		or when the process receives SIGTERM or SIGINT.
+		If Obs provides a 'Resume' checkpoint file, the saved simulation is continued instead.
+		Returns the simulation step function and the observer actually used 
+		(those saved in the checkpoint when resuming).
+		Results are saved and files closed (see Destruction) even if an exception interrupts the run.
 	"""
 	# No display, batch mode
 	Evolife = Evolife_Batch(SimulationStep, Obs)
+	if Obs.getInfo('Resume', ''):	Evolife.restore(Obs.getInfo('Resume'))
+	StopFile = Obs.getInfo('StopFile', '')
+	if not StopFile:
+		try:
+			while Evolife.ReturnFromThread(Evolife.OneStep()) >= 0:	pass
+		except KeyboardInterrupt:	pass	# results obtained so far are saved
+		finally:	Evolife.Destruction()
+		return (Evolife.OneStep, Evolife.Obs)
 	Evolife.Simulation_launch(True)
-	while True:
-		sleep(5)
-		if os.path.exists('stop'):
-			Evolife.Simulation_stop()
-			# os.remove('stop')
-		if not Evolife.simulation.is_alive():
-			break
-	Evolife.Destruction()
+	Handlers = dict()
+	def StopRequest(Signal, Frame):	Evolife.Simulation_stop()
+	for Signal in (signal.SIGTERM, signal.SIGINT):
+		try:	Handlers[Signal] = signal.signal(Signal, StopRequest)
+		except ValueError:	pass	# not in main thread
+	try:
+		while not Evolife.simulation.Finished.wait(Obs.getInfo('StopCheckPeriod', 0.5)):
+			if os.path.exists(StopFile):
+				Evolife.Simulation_stop()
+				# os.remove('stop')
+	finally:
+		for Signal in Handlers:	signal.signal(Signal, Handlers[Signal])
+		Evolife.Simulation_stop()
+		Evolife.simulation.join()	# the current step is completed
+		Evolife.Destruction()
+	return (Evolife.OneStep, Evolife.Obs)
 
 
 
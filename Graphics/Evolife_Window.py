@@ -500,6 +500,7 @@ class Simulation_Frame(Simulation_Display_Control_Frame):
 		"""
 		if self.alive:	self.dump(verbose=True)
 		self.alive = False
+		self.Obs.closeFiles()
 		Simulation_Control_Frame.closeEvent(self, event)
 		event.accept()
 
@@ -196,6 +196,7 @@ class Draw_Area(Image_Area, Curves):
 		# else:
 			# self.scaleX = self.W
 			# self.scaleY = self.H
+		self.MaxDisplayPoints = 2000	# longer curves are downsampled when redrawn
 		Curves.__init__(self)
 		self.init_Pens()	# initializes pens for drawing curves
 
@@ -300,7 +301,7 @@ class Draw_Area(Image_Area, Curves):
 		self.init_Pens()
 		self.grid()
 		for Curve in self.Curves:
-			for Segment in Curve:
+			for Segment in Curve.segments(self.MaxDisplayPoints):
 				# print(Segment)
 				self.draw(Segment[0], Segment[1], Width=Curve.thick, ColorID=Curve.ID)
 
@@ -18,9 +18,12 @@
 
 
 from sys import excepthook, exc_info
-from threading import Thread
+from threading import Thread, Event
+from queue import Queue, Full
 from time import sleep
 
+from Evolife.Tools.Tools import error
+
 
 ##################################################
 # Simulation Thread                              #
@@ -37,6 +40,7 @@ class Simulation(Thread):
 		self.Running = False
 		self.BusyDisplay = False   # indicates that display needs time to update
 		self.OneStep = OneStep	  # function that runs one simulation step
+		self.Finished = Event()	  # set when the thread is about to end
 
 	def stop(self):
 		"""	stops the thread """
@@ -50,6 +54,11 @@ class Simulation(Thread):
 
 	def run(self):
 		"""	launched by start() """
+		try:	self.steps()
+		finally:	self.Finished.set()
+
+	def steps(self):
+		"""	runs simulation steps until stopped """
 		self.Running = True
 		while self.Running:
 			try:
@@ -73,6 +82,66 @@ class Simulation(Thread):
 
 
 
+##################################################
+# Observation Thread                             #
+##################################################
+
+class Observation(Thread):
+	"""	Thread that processes observation snapshots sent by the simulation
+		(curve updates, result files), so that the simulation does not wait for them.
+		Statistics are still computed by the simulation step: only what follows
+		is taken over, which mainly helps when result files are slow to write.
+		Snapshots are stored in a bounded queue. When the queue is full,
+		Backpressure decides whether the simulation waits ('block')
+		or whether the snapshot is lost ('drop').
+		After an error, snapshots are no longer processed and the error is raised by stop().
+	"""
+	def __init__(self, Process, QueueSize=16, Backpressure='block'):
+		Thread.__init__(self, daemon=True)
+		if Backpressure not in ['block', 'drop']:
+			error('Observation', f'unknown backpressure policy: {Backpressure}')
+		self.Process = Process	  # function that processes one snapshot
+		self.Queue = Queue(maxsize=QueueSize)
+		self.Backpressure = Backpressure
+		self.Dropped = 0	# number of lost snapshots
+		self.Error = None	# first exception raised by Process
+
+	def submit(self, Snapshot):
+		"""	called by the simulation: Snapshot is queued (or dropped if the queue is full in 'drop' mode)
+		"""
+		if self.Backpressure == 'block':
+			self.Queue.put(Snapshot)
+			return True
+		try:	self.Queue.put_nowait(Snapshot)
+		except Full:
+			self.Dropped += 1
+			return False
+		return True
+
+	def drain(self):
+		"""	waits until all submitted snapshots have been processed """
+		self.Queue.join()
+
+	def stop(self):
+		"""	processes remaining snapshots, stops the thread 
+			and raises the error that occurred in the thread, if any
+		"""
+		self.Queue.put(None)	# end marker, never dropped
+		self.join()
+		if self.Error is not None:	raise self.Error
+
+	def run(self):
+		"""	launched by start() """
+		while True:
+			Snapshot = self.Queue.get()
+			if Snapshot is None:	break
+			try:	
+				if self.Error is None:	self.Process(Snapshot)	# no partial results after an error
+			except Exception as Msg:	self.Error = Msg
+			finally:	self.Queue.task_done()
+
+
+
 #################################
 # Test                          #
 #################################
@@ -42,7 +42,9 @@ sys.path.append('..')
 from Evolife.Scenarii.Parameters import Parameters
 
 ScenarioName = ''
-ScenarioName = Parameters(CfgFileName)['ScenarioName']
+Cfg = Parameters(CfgFileName)
+Cfg.setErrorPolicy()	# in batch mode, errors should not wait for keyboard
+ScenarioName = Cfg['ScenarioName']
 if ScenarioName == '':	ScenarioName = input('Name of the scenario: ')
 
 #####################################
@@ -88,7 +90,7 @@ Obs.TextDisplay('Python: %s on %s (%s)\n' % (platform.python_version(), platform
 Obs.TextDisplay('\n' + Genetic_map.__str__(MyScenario)+'\n')	# calling class method with class instance as argument
 Obs.TextDisplay('\nScenario ' + ScenarioName + ' initialized\n')
 	
-from Evolife.Tools.Tools import errorDisplay
+from Evolife.Tools.Tools import errorDisplay, pause
 # Obs.TextDisplay('(boosting Python: %s)\n' % Evolife.Tools.Tools.boost())
 
 
@@ -112,7 +114,7 @@ except:
 	# the error stack is displayed
 	from sys import excepthook, exc_info
 	excepthook(exc_info()[0], exc_info()[1], exc_info()[2])
-	input('[Entree]')
+	pause('[Entree]')
 
 
 
@@ -135,7 +137,7 @@ if MyScenario['BatchMode'] == 0:
 		# the error stack is displayed
 		from sys import excepthook, exc_info
 		excepthook(exc_info()[0], exc_info()[1], exc_info()[2])
-		input('[Entree]')
+		pause('[Entree]')
 else:   # Batch mode: No display whatsoever
 	import Evolife.Graphics.Evolife_Batch
 	Evolife.Graphics.Evolife_Batch.Start(Pop.one_year, Obs)
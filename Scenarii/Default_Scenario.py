@@ -54,36 +54,41 @@
 import sys
 if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
-import random
-
 from Evolife.Scenarii.Parameters import Parameters
 from Evolife.Genetics.Genetic_map import Genetic_map
 from Evolife.Tools.Tools import decrease, chances
+from Evolife.Tools import RandomStreams
 
 class Default_Scenario(Parameters, Genetic_map):
 	"""	All functions defined here can be
 		overloaded in specific scenarii (see module doc)
 	"""
-	def __init__(self, Name='Default scenario', CfgFile=''):
-		"""	Loads parameters, sets gene map and calls local initialization. 
+	def __init__(self, Name='Default scenario', CfgFile='', ParamDict=None):
+		"""	Loads parameters (from ParamDict if provided), sets gene map and calls local initialization. 
 		"""
 		self.Name = Name
 		# loading parameter values
 		if CfgFile == '':	CfgFile = self.Name + '.evo'
-		try:	Parameters.__init__(self,CfgFile)
+		try:	Parameters.__init__(self, CfgFile, ParamDict=ParamDict)
 		except IOError:
 			print("%s -- File not found." % CfgFile)
 			CfgFile = 'Evolife.evo'
 			print("Loading parameters from %s" % CfgFile)
 			Parameters.__init__(self,CfgFile)
 
-		# option for deterministic evolution
-		if self.Parameter('RandomSeed', Default=0) > 0:	random.seed(self['RandomSeed'])
+		# deterministic evolution: RandomSeed (drawn if absent) seeds random streams
+		RandomStreams.seed(self.Parameter('RandomSeed', Default=0), self)
 		
 		# creating the genetic map
 		Genetic_map.__init__(self, self.genemap())
 		self.initialization()
 
+	def stream(self, *Names):
+		"""	random generator named 'Scenario_<Names>' (see RandomStreams),
+			e.g. self.stream('Partners').choice(partners)
+		"""
+		return RandomStreams.stream('Scenario', *Names)
+
 	def initialization(self):
 		"""	local initialization, to be overloaded 
 		"""
@@ -144,7 +149,7 @@ class Default_Scenario(Parameters, Genetic_map):
 		partners = members[:]
 		partners.remove(indiv)
 		if partners != []:
-			return random.choice(partners)
+			return self.stream('Partners').choice(partners)
 		else:
 			return None
 					
@@ -174,7 +179,7 @@ class Default_Scenario(Parameters, Genetic_map):
 		# Then: play multipartite games
 		for play in range(self.Parameter('Rounds', Default=1)):
 			players = members[:]	# ground copy
-			random.shuffle(players)
+			self.stream('Rounds').shuffle(players)
 			# Individuals engage in several interactions successively
 			for indiv in players:
 				Partner = self.partner(indiv, players)
@@ -221,7 +226,7 @@ class Default_Scenario(Parameters, Genetic_map):
 		for Rank in range(len(RankedCandidates)):
 			candidates[Rank][1] = chances(
 									decrease(Rank, len(RankedCandidates), self['Selectivity']), 
-										   2 * Def_Nb_Children)
+										   2 * Def_Nb_Children, Rnd=self.stream('Couples'))
 		# print()
 		# print(self.Parameter('Selectivity'), 2 * Def_Nb_Children)
 		# print([f"{decrease(ii,len(RankedCandidates), self.Parameter('Selectivity')):.3f}" for ii in range(len(RankedCandidates))])
@@ -234,7 +239,7 @@ class Default_Scenario(Parameters, Genetic_map):
 			children that indiv can still have
 		"""
 		try:
-			return random.sample(candidates, 2)
+			return self.stream('Couples').sample(candidates, 2)
 		except ValueError:	return None
 		
 	def couples(self, members, nb_children=-1):
@@ -246,7 +251,7 @@ class Default_Scenario(Parameters, Genetic_map):
 		"""
 
 		if nb_children < 0:		# the number of children may be imposed (e.g. in s_gazelle)
-			nb_children = chances(self['ReproductionRate'] / 100.0, len(members))
+			nb_children = chances(self['ReproductionRate'] / 100.0, len(members), Rnd=self.stream('Couples'))
 
 		candidates = self.parenthood(members, nb_children)
 		# print(candidates)
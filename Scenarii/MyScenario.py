@@ -21,8 +21,10 @@
 
 import sys
 from os import listdir
-from os.path import basename, splitext
+from os.path import basename, splitext, dirname, abspath
+from importlib import import_module
 from traceback import print_exc
+from Evolife.Tools.Tools import pause
 
 
 ####################################################################
@@ -57,24 +59,31 @@ def AvailableScenarii():
 		print('Available scenarii are: ')
 		print('\t\t\t' + '\n\t\t\t'.join(sorted(list(ScnList))), '\n')
 
+ScenarioRegistry = None	# scenario name --> module name, see Registry
+
+def Registry():
+	"""	Returns a table {scenario name: module name} of scenarii available in Evolife/Scenarii.
+		The directory is scanned once; scenario modules are only imported when retrieved.
+	"""
+	global ScenarioRegistry
+	if ScenarioRegistry is None:
+		ScenarioRegistry = dict()
+		try:	Files = listdir(dirname(abspath(__file__)))
+		except OSError:	Files = []	# e.g. zipped package
+		for F in Files:
+			(Module, Ext) = splitext(F)
+			if Module.startswith('S_') and Ext == '.py':
+				ScenarioRegistry[Module[2:]] = 'Evolife.Scenarii.' + Module
+	return ScenarioRegistry
+
 def usage():
 	print('Usage:', splitext(basename(sys.argv[0]))[0], '<configuration_file (xxx.evo)>')
 
 def RetrieveScenarioClass(ScenarioName):
 	""" imports the file containing the scenario to retrieve the scenario class
 	"""
-
-	def my_import(name):
-		# this function is taken from Python's help
-		mod = __import__(name)
-		components = name.split('.')
-		for comp in components[1:]:
-			mod = getattr(mod, comp)
-		return mod
-
-
 	try:
-		ScenarioModule = my_import('Evolife.Scenarii.S_' + ScenarioName)
+		ScenarioModule = import_module(Registry().get(ScenarioName, 'Evolife.Scenarii.S_' + ScenarioName))
 		return ScenarioModule.Scenario
 ##        return __import__('Evolife.Scenarii.S_' + ScenarioName, globals(), locals(), ['Scenario'])
 	except ImportError:
@@ -83,19 +92,21 @@ def RetrieveScenarioClass(ScenarioName):
 		usage()
 		AvailableScenarii()
 		print('File S_' + ScenarioName + '.py not found or incorrect\n')
-		input('[Enter]')
+		pause('[Enter]')
 		print_exc()
-		input('[Enter]')
+		pause('[Enter]')
 		raise SystemExit('Exiting Evolife')
 
 
-def InstantiateScenario(ScenarioClass, ScenarioName, CfgFileName=''):
+def InstantiateScenario(ScenarioClass, ScenarioName, CfgFileName='', ParamDict=None):
 	""" creates an actual scenario by instantiating the corresponding class
+		(parameters are taken from ParamDict if provided, from CfgFileName otherwise)
 	"""
 
 	global MyScenario
 
-	MyScenario = ScenarioClass(Name=ScenarioName, CfgFile=CfgFileName)
+	if ParamDict is None:	MyScenario = ScenarioClass(Name=ScenarioName, CfgFile=CfgFileName)
+	else:	MyScenario = ScenarioClass(Name=ScenarioName, CfgFile=CfgFileName, ParamDict=ParamDict)
 	return MyScenario
 
 
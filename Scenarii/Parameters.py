@@ -18,11 +18,18 @@
 
 
 import sys
+import os
 import re
+import ast
+import copy
+import json
+import time
+import hashlib
+from collections import namedtuple
 
 if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
-from Evolife.Tools.Tools import FileAnalysis, error
+from Evolife.Tools.Tools import FileAnalysis, error, errorPolicy
 
 
 #########################################
@@ -41,10 +48,10 @@ def Num(x):
 	else:	return x
 
 def Alph(x):
-	"""	interpreting strings as possible python expressions 
+	"""	interpreting strings as possible python literals (numbers, strings, lists, dicts...)
 	"""
-	try:	return(eval(x))
-	except (NameError, SyntaxError, ValueError):	
+	try:	return(ast.literal_eval(x.strip()))
+	except (SyntaxError, ValueError, TypeError, MemoryError, RecursionError):	
 		# ====== unpacking '+'-separated lists
 		if re.search('\w\+\w', x):
 			return(x.split('+'))
@@ -56,6 +63,92 @@ def AlphNum(x):
 	try:	return Num(x)
 	except ValueError:	return Alph(x)
 
+SnapshotClasses = dict()	# field names --> namedtuple class, see Parameters.snapshot
+
+def SnapshotClass(Fields):
+	"""	namedtuple class for parameter snapshots (one class per set of fields)
+	"""
+	if Fields not in SnapshotClasses:
+		Record = namedtuple('ParameterSnapshot', Fields)
+		Record.__reduce__ = lambda self: (SnapshotRecord, (self._fields, tuple(self)))	# for pickle
+		SnapshotClasses[Fields] = Record
+	return SnapshotClasses[Fields]
+
+def SnapshotRecord(Fields, Values):
+	"""	rebuilds a parameter snapshot (used when unpickling)
+	"""
+	return SnapshotClass(Fields)(*Values)
+
+#########################################
+# Cache of parsed configuration files   #
+#########################################
+
+ParseCache = dict()	# (file path, modification time, content digest) --> parsed configuration
+
+def CacheDir():
+	"""	per-user directory where parsed configurations are stored
+	"""
+	return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')), 'evolife')
+
+def CacheFile(Path):
+	return os.path.join(CacheDir(), hashlib.sha1(Path.encode()).hexdigest() + '.json')
+
+def StoredConfiguration(Key):
+	"""	Returns the configuration stored on disk for Key, or None.
+		JSON is used rather than pickle, as reading it cannot execute code.
+	"""
+	try:
+		with open(CacheFile(Key[0]), encoding='utf-8') as Filin:	Stored = json.load(Filin)
+		if tuple(Stored['Key']) == Key:	return Stored['Cfg']
+	except (OSError, ValueError, KeyError, TypeError):	pass	# missing, obsolete or corrupted cache
+	return None
+
+def StoreConfiguration(Key, Cfg):
+	"""	Stores Cfg on disk, provided that JSON preserves it exactly
+		(e.g. tuples or non-string keys are not preserved: such configurations are not stored)
+	"""
+	try:
+		Text = json.dumps({'Key': Key, 'Cfg': Cfg})
+		if json.loads(Text)['Cfg'] != Cfg:	return
+		os.makedirs(CacheDir(), mode=0o700, exist_ok=True)
+		TmpFile = f'{CacheFile(Key[0])}.{os.getpid()}'
+		with open(TmpFile, 'w', encoding='utf-8') as Filout:	Filout.write(Text)
+		os.replace(TmpFile, CacheFile(Key[0]))	# atomic: simultaneous runs never read a partial file
+	except (OSError, ValueError, TypeError):	pass	# unwritable location or unserializable value: memory cache only
+
+def CachedConfiguration(CfgFile, Parse):
+	"""	Returns the typed configuration stored in CfgFile, as computed by Parse(CfgFile).
+		Results are kept in memory for the lifetime of the process (and inherited by forked runs)
+		and in a per-user cache directory (see CacheDir) as JSON files,
+		keyed by path, modification time and content digest, so that
+		launching many runs on the same file does not parse it again.
+	"""
+	try:
+		with open(CfgFile, 'rb') as Filin:	Content = Filin.read()
+		Key = (os.path.abspath(CfgFile), os.stat(CfgFile).st_mtime_ns, 
+				hashlib.sha1(Content).hexdigest())
+	except OSError:	return Parse(CfgFile)	# Parse is responsible for error reporting
+	if Key not in ParseCache:
+		Cfg = StoredConfiguration(Key)
+		if Cfg is None:
+			Cfg = Parse(CfgFile)
+			if Cfg is None:	return Cfg
+			StoreConfiguration(Key, Cfg)
+		ParseCache[Key] = Cfg
+	return copy.deepcopy(ParseCache[Key])	# values such as lists may be modified by callers
+
+def benchmark(CfgFile, Repeat=200):
+	"""	Prints the time needed to load CfgFile by parsing it, from the disk cache and from memory
+	"""
+	def timing(Load):
+		Start = time.perf_counter()
+		for _ in range(Repeat):	Load()
+		return (time.perf_counter() - Start) / Repeat * 1e6
+	print(f'parsing:    {timing(lambda: Parameters(ParamDict={}).typed_cfg(CfgFile)):8.1f} us')
+	Parameters(CfgFile)	# stores the configuration
+	print(f'disk cache: {timing(lambda: (ParseCache.clear(), Parameters(CfgFile))):8.1f} us')
+	print(f'memory:     {timing(lambda: Parameters(CfgFile)):8.1f} us')
+
 	
 class Parameters(dict):
 	""" class Parameters: stores all modifiable parameters
@@ -65,16 +158,22 @@ class Parameters(dict):
 		"""	Loads parameters from text file
 		"""
 		if ParamDict is not None:	dict.__init__(self, ParamDict)	# dictionnary of (parameter name, value)
-		else:			dict.__init__(self, self.txt_to_cfg(CfgFile))
+		else:			dict.__init__(self, CachedConfiguration(CfgFile, self.typed_cfg))
 		self.Params = self	# backward compatibility
 		self.relevant = set()  # list of parameters that are actually used
-		for p in self:	self[p] = AlphNum(self.Parameter(p, Silent=True))
+		self.Snapshots = dict()	# frozen parameter records, see snapshot
+		if ParamDict is not None:
+			for p in self:	self[p] = AlphNum(self.Parameter(p, Silent=True))
 		# print(self)
 
 	def __getitem__(self, ParamName):	
 		# to make sure that 'relevant' will be processed
 		return self.Parameter(ParamName)
 	
+	def __setitem__(self, ParamName, Value):
+		self.Snapshots = dict()	# existing snapshots no longer reflect parameter values
+		dict.__setitem__(self, ParamName, Value)
+
 	def txt_to_cfg(self,CfgTxtFile):
 		""" retrieves a configuration from a text file
 		"""
@@ -99,6 +198,13 @@ class Parameters(dict):
 			error("Evolife_Parameters: Problem accessing configuration file", CfgTxtFile)
 		return None
 
+	def typed_cfg(self, CfgTxtFile):
+		"""	retrieves a configuration from a text file and interprets values
+		"""
+		cfg = self.txt_to_cfg(CfgTxtFile)
+		if cfg is None:	return None
+		return {p: AlphNum(v) for (p, v) in cfg.items()}
+
 	def cfg_to_txt(self, CfgTxtFile):
 		""" stores parameters into a text file
 		"""
@@ -116,17 +222,52 @@ class Parameters(dict):
 			try:	p = dict.__getitem__(self, ParamName)	# parent getitem
 			except KeyError:	
 				print(self.relevant)
-				error("Evolife_Parameters: Attempt to reach undefined parameter: ", ParamName)
+				error("Evolife_Parameters: Attempt to reach undefined parameter: ", ParamName, Parameter=ParamName)
 		if not Silent and ParamName not in self.relevant and ParamName in self: 
 			self.relevant.add(ParamName)
 		return p
 
+	def setErrorPolicy(self, BatchMode=None):
+		"""	Applies parameters 'ErrorPolicy' and 'ErrorLog' (see Tools.errorPolicy).
+			By default, errors are logged in batch mode and handled interactively otherwise.
+		"""
+		if BatchMode is None:	BatchMode = self.Parameter('BatchMode', Default=0)
+		Policy = self.Parameter('ErrorPolicy', Default='log' if BatchMode else 'interactive')
+		return errorPolicy(Policy, self.Parameter('ErrorLog', Default=None))
+
 	def Param(self, ParamName, default=None):
 		"""	Retrieves a parameter value.
 		"""
 		if default is not None:	return self.Parameter(ParamName, Default=default) 
 		return self[ParamName]
 	
+	def snapshot(self, *Names, Silent=(), **Defaults):
+		"""	Returns an immutable record (namedtuple) with the current values 
+			of parameters Names (which must exist), of parameters given 
+			with default values in Defaults, e.g. snapshot('MutationRate', AgeMax=0),
+			and of optional parameters Silent (None if absent).
+			Relevance of Names and Defaults is recorded once here, so that objects can bind the record 
+			at creation and then read parameters in hot loops as mere attributes.
+			Parameters in Silent are not recorded as relevant: the caller should call 'used'
+			when it actually relies on them.
+			Records are shared until a parameter is modified. Objects keep the record they bound:
+			a parameter modified afterwards only affects objects created after the modification.
+		"""
+		Key = (Names, tuple(Silent), tuple(Defaults.items()))
+		try:	return self.Snapshots[Key]
+		except KeyError:	pass
+		Record = SnapshotClass(Names + tuple(Silent) + tuple(Defaults))
+		Snapshot = Record(*[self.Parameter(P) for P in Names],
+						  *[self.Parameter(P, Default=None, Silent=True) for P in Silent],
+						  *[self.Parameter(P, Default=D) for (P, D) in Defaults.items()])
+		self.Snapshots[Key] = Snapshot
+		return Snapshot
+
+	def used(self, ParamName):
+		"""	Records ParamName as relevant (e.g. when read silently through a snapshot)
+		"""
+		if ParamName not in self.relevant and ParamName in self:	self.relevant.add(ParamName)
+
 	def addParameter(self, Param, Value):
 		"""	Adds a new parameter or modify its value
 		"""
@@ -168,6 +309,9 @@ class Parameters(dict):
 if __name__ == "__main__":
 	print(__doc__ + '\n')
 	# print Defs.__doc__ + '\n'
+	if len(sys.argv) > 2 and sys.argv[2] == '-b':	# startup benchmark
+		benchmark(sys.argv[1])
+		sys.exit()
 	if len(sys.argv) > 1:
 		Evolife_Parameters = Parameters(sys.argv[1])
 	else:
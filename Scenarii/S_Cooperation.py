@@ -29,7 +29,6 @@
 import sys
 if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
-import random
 
 from Evolife.Tools.Tools import percent, noise_mult, error
 from Evolife.Scenarii.Default_Scenario import Default_Scenario
@@ -90,7 +89,7 @@ class Scenario(Default_Scenario):
 			# In the reciprocity scenario, merely return BF 
 			# if not None else choose randomly
 			#-----------------------------------------------#
-			if BF and random.randint(0,100) >= indiv.gene_relative_value('Exploration'):
+			if BF and self.stream('Partners').randint(0,100) >= indiv.gene_relative_value('Exploration'):
 				return BF
 			# Exploration: a new partner is randomly chosen
 			partners = others[:]	# ground copy of the list
@@ -98,11 +97,11 @@ class Scenario(Default_Scenario):
 			if BF in others:
 				partners.remove(BF)
 			if partners != []:
-				return random.choice(partners)
+				return self.stream('Partners').choice(partners)
 			else:
 				return None
 		else:
-			if BF is None or 100 * random.random() < self['NewEncounterProbability']:	BF = random.choice(others) 
+			if BF is None or 100 * self.stream('Partners').random() < self['NewEncounterProbability']:	BF = self.stream('Partners').choice(others) 
 			return BF
 
 	def interaction(self, indiv, Partner):
@@ -114,7 +113,7 @@ class Scenario(Default_Scenario):
 		
 		#   First step: initial gift
 		gift = percent(self['FirstStep'] * indiv.gene_relative_value('Cooperativeness'))
-		Partner.score(noise_mult(gift, self['Noise']))	# multiplicative noise
+		Partner.score(noise_mult(gift, self['Noise'], Rnd=self.stream('Interaction')))	# multiplicative noise
 		#   First player pays associated cost
 		#   Cost is a function of investment
 		cost = percent(gift * self['FirstStepCost'])
@@ -130,7 +129,7 @@ class Scenario(Default_Scenario):
 			#   Second step
 			answer = percent(self['SecondStep'] * gift)
 			answer = percent(answer * Partner.gene_relative_value('Reciprocity'))
-			indiv.score(noise_mult(answer, self['Noise']))	# multiplicative noise
+			indiv.score(noise_mult(answer, self['Noise'], Rnd=self.stream('Interaction')))	# multiplicative noise
 			#   Second player pays associated cost
 			#   Cost is a function of investment
 			cost = percent(answer * self['SecondStepCost'])
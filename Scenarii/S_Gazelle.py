@@ -26,7 +26,6 @@ Imagine two species, call them gazelles and lions. Gazelles have the genetically
 from __future__ import print_function
 
 
-import random
 from math import sqrt
 
 import sys
@@ -123,7 +122,7 @@ class Scenario(Default_Scenario):
 		"""
 		# this version makes sure that gazelles interact only with lions and vice versa
 		if self.lion(indiv):
-			if self.Gazelles:	return random.choice(self.Gazelles)
+			if self.Gazelles:	return self.stream('Partners').choice(self.Gazelles)
 			else:			return None
 		return None
 		
@@ -166,7 +165,7 @@ class Scenario(Default_Scenario):
 			# print('>',GazelleCurrentStrength, end="")
 			Vulnerability = self['Vulnerability']	# Slope of exposure decrease with strength
 			Exposure = decrease(max(0,GazelleCurrentStrength), 100, Vulnerability)/decrease(0, 100, Vulnerability)
-			if (GazelleCurrentStrength > 0) and (random.random() > Exposure):
+			if (GazelleCurrentStrength > 0) and (self.stream('Interaction').random() > Exposure):
 				# Unsuccessful hunt - Lion gets penalized
 				# print('-', end=" ", flush=True)
 				# print(GazelleCurrentStrength)
@@ -210,7 +209,7 @@ class Scenario(Default_Scenario):
 		# print([L.score() for L in lions])
 		Desired_ratio = self['GazelleToLionRatio']
 		# global number of children
-		nb_children = chances(self['ReproductionRate'] / 100.0, len(livingGazelles) + len(lions))
+		nb_children = chances(self['ReproductionRate'] / 100.0, len(livingGazelles) + len(lions), Rnd=self.stream('Couples'))
 		# Distribution:
 		nb_gazelle_target =  int(round(Desired_ratio * nb_children / 100.0))
 		nb_lion_target =  1 + int(round((100 - Desired_ratio) * nb_children / 100.0))
@@ -24,7 +24,6 @@ Two players confront each other over a resource whose full value is V to either
 	#=============================================================#
 
 import sys
-import random
 if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
 
@@ -82,15 +81,15 @@ class Scenario(Default_Scenario):
 		indiv.score(0, FlagSet=True)
 
 	def hawk(self, indiv):
-		if random.randint(0,100) < self['Noise']:
-			return random.choice([True, False])
+		if self.stream('Interaction').randint(0,100) < self['Noise']:
+			return self.stream('Interaction').choice([True, False])
 		if self['Correction'] == 0:
 			# With a gradual gene, you have to change the line below
 			# since the gene will provide a probability of being hawk.
 			# Use indiv.gene_relative_value('Hawk') to get a value between 0 and 100.
 			return indiv.gene_value('Hawk') > 0
 		else:
-			return random.randint(0,100) < indiv.gene_relative_value('Hawk')
+			return self.stream('Interaction').randint(0,100) < indiv.gene_relative_value('Hawk')
 		
 	def interaction(self, indiv, partner):
 		self.Encounters += 1
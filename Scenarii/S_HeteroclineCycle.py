@@ -50,7 +50,6 @@ if __name__ == '__main__':  sys.path.append('../..')  # for tests
 # specific variables and functions   #
 ######################################
 
-import random
 from Evolife.Scenarii.Default_Scenario import Default_Scenario
 from Evolife.Tools.Tools import percent
 
@@ -156,8 +155,8 @@ class Scenario(Default_Scenario):
 	def update_positions(self, members, groupLocation):
 		" Allows to define spatial coordinates for individuals. "
 		for m in members:
-			dx = random.randint(0,6)
-			dy = random.randint(0,6)
+			dx = self.stream('Positions').randint(0,6)
+			dy = self.stream('Positions').randint(0,6)
 			if self.Species(m) == 'A':		m.location = (7+dx, 7+dy, 'white')
 			elif self.Species(m) == 'B':	m.location = (47+dx, 87+dy, 'red')
 			elif self.Species(m) == 'C':	m.location = (87+dx, 7+dy, 'blue')
@@ -28,7 +28,6 @@ if __name__ == '__main__':  sys.path.append('../..')  # for tests
 # specific variables and functions   #
 ######################################
 
-from random import randint
 
 
 
@@ -105,7 +104,7 @@ class Scenario(Default_Scenario):
 				# we hit a wall
 				walls += 1
 				# we get another chance by trying a random direction
-				NewPosition = self.grid(Positions[-1],randint(0,3))
+				NewPosition = self.grid(Positions[-1],self.stream('Moves').randint(0,3))
 				if NewPosition == None:
 					continue	# try to be more successful with the next step
 			if len(Positions) > 1 and NewPosition == Positions[-2]:
@@ -26,19 +26,28 @@ features such as the peacock tail as results of sexual selection.
 	#=============================================================#
 
 
-import random
 import sys
 from Evolife.Scenarii.Default_Scenario import Default_Scenario
 from Evolife.Tools.Tools import error, chances
 
-Numpy = True
-try:	import numpy
-except ImportError:	Numpy = False
-
 ######################################
 # specific variables and functions   #
 ######################################
 
+def correlation(X, Y):
+	"""	Pearson correlation between X and Y (0 if undefined)
+		(computed directly: importing numpy costs more than the computation)
+	"""
+	N = len(X)
+	if N < 2:	return 0
+	MX = sum(X) / N
+	MY = sum(Y) / N
+	Cov = sum([(x-MX) * (y-MY) for (x, y) in zip(X, Y)])
+	VX = sum([(x-MX) ** 2 for x in X])
+	VY = sum([(y-MY) ** 2 for y in Y])
+	if VX == 0 or VY == 0:	return 0
+	return Cov / (VX * VY) ** 0.5
+
 
 class Scenario(Default_Scenario):
 
@@ -95,10 +104,8 @@ class Scenario(Default_Scenario):
 		if len(members):	self.FemaleActualDemand /= len(members)	# average value
 
 		# Computing gene correlation
-		if Numpy:
-			C = numpy.corrcoef([i.gene_value('FemaleDemand') for i in members], [i.gene_value('MaleInvestment') for i in members])[0][1]
-			if numpy.isnan(C):	C = 0	# check for undefined results
-			self.GeneCorrelation = 50 * (1 + C)	
+		C = correlation([i.gene_value('FemaleDemand') for i in members], [i.gene_value('MaleInvestment') for i in members])
+		self.GeneCorrelation = 50 * (1 + C)	
 
 
 	def parenthood(self, RankedCandidates, Def_Nb_Children):
@@ -107,8 +114,8 @@ class Scenario(Default_Scenario):
 		candidates = [[m,0] for m in RankedCandidates]
 		for P in candidates:
 			# call to 'chances' allow parameters < 1
-			if self.female(P[0]):	P[1] = chances(1, self.Parameter('FemaleFertility'))
-			elif self.male(P[0]):	P[1] = chances(1, self.Parameter('MaleFertility'))
+			if self.female(P[0]):	P[1] = chances(1, self.Parameter('FemaleFertility'), Rnd=self.stream('Couples'))
+			elif self.male(P[0]):	P[1] = chances(1, self.Parameter('MaleFertility'), Rnd=self.stream('Couples'))
 		return candidates
 		
 	def parents(self, Candidates):						
@@ -120,12 +127,12 @@ class Scenario(Default_Scenario):
 		males = [M for M in Candidates if self.male(M[0])]
 		if len(females) == 0:	return None
 		if len(males) == 0:	return None
-		mother = random.choice(females)
+		mother = self.stream('Couples').choice(females)
 		bestSignal = 0
 		father = None
 		for trial in range(1+int(mother[0].FD * self.Parameter('MaxCourtship') / 100.0)):
 			# print(int(bestSignal), end=' ', flush=True)
-			male = random.choice(males)
+			male = self.stream('Couples').choice(males)
 			MaleQuality = male[0].Phene_value('MaleQuality')
 			signal = male[0].gene_relative_value('MaleInvestment') * MaleQuality
 			if signal >= bestSignal:
@@ -158,7 +165,7 @@ class Scenario(Default_Scenario):
 		for m in members:
 			colour = 'pink' if self.female(m) else 'lightblue'
 			if self.female(m):
-				m.location = (groupLocation + m.FD, random.randint(1,99), colour, 6)
+				m.location = (groupLocation + m.FD, self.stream('Positions').randint(1,99), colour, 6)
 			else:
 				m.location = (groupLocation + m.Phene_value('MaleQuality'),
 					m.gene_relative_value('MaleInvestment'), colour, 6)		
@@ -35,7 +35,6 @@ if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
 
 
-import random
 
 from Evolife.Scenarii.Default_Scenario import Default_Scenario
 
@@ -83,7 +82,7 @@ class Scenario(Default_Scenario):
 		
 		mothers = [m for m in candidates if self.female(m[0])]
 		fathers = [f for f in candidates if self.male(f[0])]
-		try:	return (random.choice(mothers), random.choice(fathers))
+		try:	return (self.stream('Couples').choice(mothers), self.stream('Couples').choice(fathers))
 		except	IndexError:	return None
 		
 	def new_agent(self, child, parents):
@@ -94,7 +93,7 @@ class Scenario(Default_Scenario):
 			# deciding the child's sex
 			mother = parents[0]
 			# Let's uppose that mom's genes decide
-			if random.randint(0,100) >= mother.gene_relative_value('sexControl'):
+			if self.stream('Newborns').randint(0,100) >= mother.gene_relative_value('sexControl'):
 				child.Phene_value('Sex',100)	# It's a girl !
 			else:
 				child.Phene_value('Sex',0)		# It's a boy !
@@ -102,7 +101,7 @@ class Scenario(Default_Scenario):
 			# testing selective death
 			if self['SelectiveDeath']:
 				# male eggs are killed
-				if self.male(child) and random.randint(0,100) < self['SelectiveDeath']:
+				if self.male(child) and self.stream('Newborns').randint(0,100) < self['SelectiveDeath']:
 					return False
 		
 			if self['Hymenoptera'] and self.female(child):
@@ -93,7 +93,7 @@ class Scenario(Default_Scenario):
 
 		def signals(indiv,noisy=0):
 			if noisy:
-				return noise_add(indiv.gene_relative_value('signal'),self.Parameter('Noise')) > 50
+				return noise_add(indiv.gene_relative_value('signal'),self.Parameter('Noise'), Rnd=self.stream('Interaction')) > 50
 			else:
 				return indiv.gene_relative_value('signal') > 50
 
@@ -103,10 +103,10 @@ class Scenario(Default_Scenario):
 			"""
 			if signal:
 				return noise_add(indiv.gene_relative_value('hunt_if_1'),
-							 self.Parameter('Noise')) > 50
+							 self.Parameter('Noise'), Rnd=self.stream('Interaction')) > 50
 			else:
 				return noise_add(indiv.gene_relative_value('hunt_if_0'),
-							 self.Parameter('Noise')) > 50
+							 self.Parameter('Noise'), Rnd=self.stream('Interaction')) > 50
 	##		return signals(indiv) == signal
 
 		# implementing the payoff matrix
@@ -32,7 +32,6 @@ if __name__ == '__main__':  sys.path.append('../..')  # for tests
 # specific variables and functions   #
 ######################################
 
-import random
 
 class Grid(object):
 	""" Defines the 2-D grid on which agents move
@@ -49,7 +48,7 @@ class Grid(object):
 	
 	def RandPlace(self, Agent):
 		" places Agent at a random location "
-		Pos = self.toric((random.randint(0, self.Size - 1), random.randint(0, self.Size - 1)))
+		Pos = self.toric((self.stream('Positions').randint(0, self.Size - 1), self.stream('Positions').randint(0, self.Size - 1)))
 		if self.Locate(Pos) == None:
 			self.move(Agent,Pos)
 			return Pos
@@ -69,7 +68,7 @@ class Grid(object):
 		if self.move(Agent, Position) == Agent:
 			return self.toric(Position)
 		# recursive call
-		return self.divert(Agent, random.choice(self.Neighbourhood(Position)[0:4]))
+		return self.divert(Agent, self.stream('Positions').choice(self.Neighbourhood(Position)[0:4]))
 
 	def Locate(self, Pos):
 		# returns whoever is at location Pos
@@ -265,9 +264,9 @@ class Scenario(Default_Scenario):
 		" initializes newborns "
 		child.location = ()
 		child.location = self.Ground.RandPlace(child)
-		child.Phene_value('Direction',random.randint(0,3))
+		child.Phene_value('Direction',self.stream('Newborns').randint(0,3))
 		child.Phene_value('Penalty',0)
-		child.Phene_value('Sex', random.randint(1,100))
+		child.Phene_value('Sex', self.stream('Newborns').randint(1,100))
 		self.paint(child)
 		return True
 
@@ -363,8 +362,8 @@ class Scenario(Default_Scenario):
 		" Male moves and possibily mates "
 
 		if Male.location is None:	return
-		if random.randint(0,99) < self['Noise']:
-			Dir = random.randint(0,3)
+		if self.stream('Moves').randint(0,99) < self['Noise']:
+			Dir = self.stream('Moves').randint(0,3)
 		else:
 			Dir = Direction
 		OldPosition = Male.location[0:2]
@@ -6,6 +6,7 @@
 	- Friend: Liker + possibility of imposing symmetrical liking links
 	- Follower: idem + the liked individuals know who likes them
 	- Friendship: Follower + possibility of imposing symmetrical liking links
+	- SocialGraph: optional population-level store of all liking links
 """
 
 #============================================================================#
@@ -24,18 +25,107 @@
 
 
 import sys
-import random
+from math import isclose
+from bisect import bisect_left, bisect_right, insort
 
 if __name__ == '__main__':  sys.path.append('../..')  # for tests
 
 
 from Evolife.Tools.Tools import error
+from Evolife.Tools import RandomStreams
 
 CHECKCONSISTENCY = False
+TIETOLERANCE = 1e-9	# performances closer than that (relatively) are tied
+
+def tied(Perf1, Perf2):
+	"""	Lazy weakening (see club) is not bit-exact: 
+		performances that would be equal may differ by rounding errors
+	"""
+	return isclose(Perf1, Perf2, rel_tol=TIETOLERANCE)
+
+class SocialGraph:
+	"""	Population-level store of liking links (liker --> liked).
+		Nodes are numbered; each node has a set of liked nodes and a set of likers.
+		Clubs connected to the graph write their links through it,
+		so that links pointing to an individual are known without scanning the population
+		(used by groups to restrict network checks to individuals linked to movers).
+	"""
+
+	def __init__(self):
+		self.Index = dict()	# node --> number
+		self.Nodes = []	# number --> node (None if free)
+		self.Out = []	# number --> set of liked nodes' numbers
+		self.In = []	# number --> set of likers' numbers
+		self.Free = []	# numbers available for reuse
+
+	def number(self, Node, create=True):
+		"""	returns Node's number (or None if unknown and create is False)
+		"""
+		if Node in self.Index:	return self.Index[Node]
+		if not create:	return None
+		if self.Free:
+			N = self.Free.pop()
+			self.Nodes[N] = Node
+		else:
+			N = len(self.Nodes)
+			self.Nodes.append(Node)
+			self.Out.append(set())
+			self.In.append(set())
+		self.Index[Node] = N
+		return N
+
+	def release(self, N):
+		"""	forgets node number N if it has no link anymore
+		"""
+		if not self.Out[N] and not self.In[N]:
+			del self.Index[self.Nodes[N]]
+			self.Nodes[N] = None
+			self.Free.append(N)
+
+	def link(self, Liker, Liked):
+		"""	records that Liker likes Liked
+		"""
+		(L, M) = (self.number(Liker), self.number(Liked))
+		self.Out[L].add(M)
+		self.In[M].add(L)
+
+	def unlink(self, Liker, Liked):
+		"""	records that Liker no longer likes Liked
+		"""
+		(L, M) = (self.number(Liker, create=False), self.number(Liked, create=False))
+		if L is None or M is None:	return
+		self.Out[L].discard(M)
+		self.In[M].discard(L)
+		self.release(L)
+		if M != L:	self.release(M)
+
+	def unlink_all(self, Liker):
+		"""	records that Liker no longer likes anyone
+		"""
+		L = self.number(Liker, create=False)
+		if L is None:	return
+		for M in self.Out[L]:
+			self.In[M].discard(L)
+			if M != L:	self.release(M)
+		self.Out[L] = set()
+		self.release(L)
+
+	def likers(self, Node):
+		"""	returns the nodes that like Node
+		"""
+		N = self.number(Node, create=False)
+		if N is None:	return []
+		return [self.Nodes[L] for L in self.In[N]]
+
 
 class club:
 	""" List of individuals associated with their performance.
 		The performance is used to decide who gets acquainted with whom.
+		Members are stored in a dict (member --> (performance, arrival number, scale)),
+		which keeps arrival order, and in a ranking sorted by decreasing performance,
+		ties being ordered by arrival.
+		Weakening is lazy: it only changes the club's scale. Performances recorded
+		under scale S are worth Perf * Scale / S.
 	"""
 
 	def __init__(self, sizeMax = None):
@@ -43,42 +133,61 @@ class club:
 		"""
 		self.sizeMax = sizeMax
 		if sizeMax is None:	self.sizeMax = sys.maxsize
+		self.Graph = None	# optional population-level store of links
+		self.Owner = None	# individual on behalf of whom links are stored in Graph
 		self.reset()
 
+	def connect(self, Graph, Owner):
+		"""	links will be written through Graph on behalf of Owner
+		"""
+		if Graph is self.Graph and Owner is self.Owner:	return
+		if self.Graph is not None:	self.Graph.unlink_all(self.Owner)
+		(self.Graph, self.Owner) = (Graph, Owner)
+		if Graph is not None:
+			for M in self.__members:	Graph.link(Owner, M)
+
 	def reset(self):
-		self.__members = []   # list of couples (individual, performance)
+		if self.Graph is not None:	self.Graph.unlink_all(self.Owner)
+		self.__members = dict()	# member --> (performance, arrival number, scale at arrival)
+		self.__ranking = []	# sorted list of (-performance / scale at arrival, arrival number, member)
+		self.__arrivals = 0	# arrival counter
+		self.__scale = 1.0	# cumulated weakening factor
 		
 	def names(self):	
 		"""	returns members' names (first elements of couples stored in members)
 		"""
-		return [T[0] for T in self]
+		return list(self.__members)
 
 	def performances(self):	
 		"""	returns members' performances (second elements of couples stored in members)
 		"""
-		return [T[1] for T in self]
+		return [self.performance(M) for M in self.__members]
 		
 	def present(self, MemberPerf):	
 		"""	returns True if the couple MemberPerf belongs to the club
 		"""
-		return MemberPerf in self.__members
+		(Member, Perf) = MemberPerf
+		return Member in self.__members and self.performance(Member) == Perf
 			
 	def ordered(self, reverse=True):
 		"""	returns a list of members names  (ordered by decreasing performance by default)
 		"""
-		return [T[0] for T in sorted(self.__members, key = lambda x: x[1], reverse=reverse)]
+		if reverse:	return [T[2] for T in self.__ranking]
+		return [T[0] for T in sorted(self, key = lambda x: x[1])]
 		
 	def rank(self, Member):
 		"""	returns the rank of Member in the list of decreasing performances
 		"""
-		try:	return self.ordered().index(Member)
-		except ValueError:	return -1
+		if Member not in self.__members:	return -1
+		return bisect_left(self.__ranking, self.__key(Member)[:2])
 
 	def performance(self, Member):
 		"""	returns the performance of Member
 		"""
-		try:	return self.__members[self.names().index(Member)][1]
-		except ValueError:	error('Alliances', 'Searching for non-member')
+		try:	(Perf, Arrival, Scale) = self.__members[Member]
+		except KeyError:	return error('Alliances', 'Searching for non-member')
+		if Scale == self.__scale:	return Perf
+		return Perf * (self.__scale / Scale)
 	
 	def size(self):	
 		"""	size of the club
@@ -88,13 +197,13 @@ class club:
 	def minimal(self):
 		"""	returns the minimal performance among members
 		"""
-		if len(self):	return min([T[1] for T in self])
+		if len(self):	return self.performance(self.__ranking[-1][2])
 		return -1
 
 	def maximal(self):
 		"""	returns the maximal performance among members
 		"""
-		if len(self):	return max([T[1] for T in self])
+		if len(self):	return self.performance(self.__ranking[0][2])
 		return -1
 
 	def best(self, randomTie=False):
@@ -102,23 +211,27 @@ class club:
 		"""
 		if len(self):	
 			if randomTie:
-				bestPerformance = self.maximal()
-				return random.choice([T[0] for T in self if T[1] == bestPerformance])
-			else:	return max(self, key=lambda x: x[1])[0]
+				Ties = 1
+				while Ties < len(self.__ranking) and tied(self.__ranking[Ties][0], self.__ranking[0][0]):	Ties += 1
+				return RandomStreams.stream('Alliances', 'Ties').choice([T[2] for T in self.__ranking[:Ties]])
+			else:	return self.__ranking[0][2]
 		return None
 
 	def worst(self):
 		"""	returns the member with the worst performance 
 		"""
 		if len(self):	
-			return min(self, key=lambda x: x[1])[0]
+			# among equally bad members, the first arrived one
+			First = len(self.__ranking) - 1
+			while First > 0 and tied(self.__ranking[First-1][0], self.__ranking[-1][0]):	First -= 1
+			return min(self.__ranking[First:], key=lambda T: T[1])[2]
 		return None
 
 	def average(self):
 		"""	returns average performance 
 		"""
 		if len(self):	
-			return sum([m[1] for m in self]) / len(self)
+			return sum(self.performances()) / len(self)
 		return None
 
 	def filled(self):
@@ -132,12 +245,13 @@ class club:
 		# assert performance >= 0, \
 			# f"Social link are established based on positive performance only (here {performance})"
 		if self.filled():
-			if conservative and performance <= self.minimal():
+			Minimal = self.minimal()
+			if conservative and (performance < Minimal or tied(performance, Minimal)):
 				return -1   # equality: priority given to former members
-			elif performance < self.minimal():	return -1
+			elif performance < Minimal and not tied(performance, Minimal):	return -1
 			elif len(self) == 0:	return -1 	# No member wanted
-		# ------ returning the rank that the candidate would be assigned
-		rank = len(self) - sorted([performance] + self.performances()).index(performance)
+		# ------ returning the rank that the candidate would be assigned (number of members performing at least as well)
+		rank = bisect_right(self.__ranking, (-performance / self.__scale, sys.maxsize))
 		assert rank <= self.sizeMax, f"rank = {rank} exceeds max size = {self.sizeMax} (actual size is {len(self)})"
 		return rank
 		
@@ -147,12 +261,12 @@ class club:
 		"""
 		if self.accepts(performance, conservative=conservative) >= 0:
 			# ------ First, check whether newMember is not already a member
-			if newMember in self.names():
+			if newMember in self.__members:
 				self.exits(newMember)   # to prepare the come-back
 			if self.size() >= self.sizeMax:
 				worst = self.worst() # the redundant individual will be ejected
 			else:	worst = None
-			self.__members.append((newMember, performance))
+			self.__add(newMember, performance)
 			return worst
 		if check:	error("Alliances: unchecked admittance")
 		return None
@@ -167,10 +281,11 @@ class club:
 	def exits(self, oldMember):
 		"""	a member goes out from the club 
 		"""
-		for (M,Perf) in self.__members[:]:  # safe to copy the list as it is changed within the loop
-			if M == oldMember:
-				self.__members.remove((oldMember,Perf))
-				return True
+		if oldMember in self.__members:
+			del self.__ranking[bisect_left(self.__ranking, self.__key(oldMember)[:2])]
+			del self.__members[oldMember]
+			if self.Graph is not None:	self.Graph.unlink(self.Owner, oldMember)
+			return True
 		print('exiled: %s' % str(oldMember))
 		error('Alliances: non-member attempting to quit a club')
 		return False
@@ -178,21 +293,47 @@ class club:
 	def weakening(self, Factor = 0.9):  # temporary value
 		"""	all performances are reduced (represents temporal erosion) 
 		"""
-		for (M,Perf) in self.__members[:]:  # safe to copy the list as it is changed within the loop
-			self.__members.remove((M, Perf))
-			self.__members.append((M, Perf * Factor))
+		if Factor <= 0:		# order is not preserved
+			self.__scale *= Factor
+			self.renormalize()
+		elif Factor != 1:
+			self.__scale *= Factor
+			if self.__scale < 1e-100:	self.renormalize()	# to avoid underflow
+
+	def renormalize(self):
+		"""	actually applies weakening to stored performances
+		"""
+		for M in self.__members:
+			self.__members[M] = (self.performance(M), self.__members[M][1], 1.0)
+		self.__scale = 1.0
+		self.__ranking = sorted(self.__key(M) for M in self.__members)
 
 	def limit(self, NumberOfMembers):
 		"""	keeps only a limited number of members
 		"""
-		self.__members.sort(key = lambda x: x[1], reverse=True)
-		self.__members = self.__members[:NumberOfMembers]
+		Kept = [(M, self.performance(M)) for M in self.ordered()[:NumberOfMembers]]
+		self.reset()
+		for (M, Perf) in Kept:	self.__add(M, Perf)	# members arrive in order of decreasing performance
+
+	def __key(self, Member):
+		"""	returns Member's entry in the ranking
+		"""
+		(Perf, Arrival, Scale) = self.__members[Member]
+		return (-Perf / Scale, Arrival, Member)
+
+	def __add(self, Member, Perf):
+		"""	appends Member as last arrived
+		"""
+		self.__arrivals += 1
+		self.__members[Member] = (Perf, self.__arrivals, self.__scale)
+		insort(self.__ranking, self.__key(Member))
+		if self.Graph is not None:	self.Graph.link(self.Owner, Member)
 		
-	def __iter__(self):	return iter(self.__members)
+	def __iter__(self):	return iter([(M, self.performance(M)) for M in self.__members])
 	
 	def __len__(self): return len(self.__members)
 	
-	def __contains__(self, T): return (T in self.names())
+	def __contains__(self, T): return (T in self.__members)
 		
 	def __str__(self):
 		# return "[" + '-'.join([T.ID for T in self.ordered()]) + "]"
@@ -214,6 +355,11 @@ class Liker:
 		"""	Defines Friend as a club
 		"""
 		self.friends = club(MaxFriends)
+
+	def connect(self, Graph):
+		"""	self's liking links are recorded in Graph (a SocialGraph shared by the population)
+		"""
+		self.friends.connect(Graph, self)
 	
 	#################################
 	# asymmetrical links            #
@@ -250,7 +396,7 @@ class Liker:
 	def follows(self, Friend):	
 		"""	checks whether Friend belongs to actual friends
 		"""
-		return Friend in self.names()
+		return Friend in self.friends
 		# R = Friend in self.friends.names()
 		# if R: print self.ID, 'is already following', Friend.ID
 	
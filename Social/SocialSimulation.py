@@ -16,15 +16,18 @@
 
 import sys
 import os.path
-import random
 import itertools as it
 import re
-from time import sleep
+import copy
+import socket
+from array import array
+from time import sleep, strftime
 
 sys.path.append('../../..')	# to include path to Evolife
 
 from Evolife.Scenarii import Parameters
 from Evolife.Tools import Tools
+from Evolife.Tools import RandomStreams
 from Evolife.Ecology import Observer
 from Evolife.Social import Alliances
 from Evolife.Ecology import Learner
@@ -38,6 +41,12 @@ def Once():
 	except NameError:	ONCE = True
 	return ONCE
 
+def _numerical(Value):
+	"""	converts a dumped value into a float, NaN if blank or non-numerical
+	"""
+	try:	return float(Value)
+	except (TypeError, ValueError):	return float('nan')
+
 class Global(Parameters.Parameters):
 	"""	Global elements, mainly parameters
 	"""
@@ -51,10 +60,50 @@ class Global(Parameters.Parameters):
 
 	def Dump_(self, PopDump, ResultFileName, DumpFeatures, ExpeID, Verbose=False):
 		""" Saves agents' features (possibly including agents' distance to best friend)
+			Rows are assembled in memory and written at once.
+			If 'DumpBinary' is set, features are also saved column by column
+			in a binary file (see DumpBinary_)
+		"""
+		Columns = self.DumpColumns(PopDump, DumpFeatures)
+		if Columns is None:	return
+		DumpFileName = ResultFileName + '_dmp.csv'
+		if Verbose:	print("Saving data to", DumpFileName)
+		Lines = ['#%s' % ExpeID] + [";".join(Row) for Row in self.DumpRows(Columns=Columns)]
+		with open(DumpFileName, 'w') as SNResultFile:
+			SNResultFile.write("\n".join(Lines) + "\n")
+		if self.Parameter('DumpBinary', Default=0):
+			self.DumpBinary_(Columns, ResultFileName, Verbose=Verbose)
+
+	def DumpBinary_(self, Columns, ResultFileName, Verbose=False):
+		"""	Saves feature columns as consecutive arrays of doubles into <ResultFile>_dmp.bin
+			(blank or non-numerical values are stored as NaN).
+			<ResultFile>_dmp_idx.csv indicates, for each feature, 
+			the position (in number of values) and the length of its column.
+			Tools.ResultMatrix.LoadColumns reads these files back.
+		"""
+		(OldStyle, Names, Values) = Columns
+		BinFileName = ResultFileName + '_dmp.bin'
+		if Verbose:	print("Saving binary data to", BinFileName)
+		Index = ['Feature;Offset;Count']
+		Offset = 0
+		with open(BinFileName, 'wb') as BinFile:
+			for (Name, Column) in zip(Names, Values):
+				Data = array('d', map(_numerical, Column))
+				if sys.byteorder != 'little':	Data.byteswap()	# file is little-endian
+				Data.tofile(BinFile)
+				Index.append('%s;%d;%d' % (Name, Offset, len(Data)))
+				Offset += len(Data)
+		with open(ResultFileName + '_dmp_idx.csv', 'w') as IdxFile:
+			IdxFile.write("\n".join(Index) + "\n")
+
+	def DumpColumns(self, PopDump, DumpFeatures):
+		"""	Collects agents' features column by column.
+			Returns (OldStyle, Names, Columns) or None if there is nothing to dump
+			OldStyle: one column per feature, agents sorted by competence
+			NewStyle: a column of competence values, and then one column per feature
 		"""
-		
 		# ====== storing feature values 
-		if DumpFeatures is None or len(DumpFeatures) == 0:	return
+		if DumpFeatures is None or len(DumpFeatures) == 0:	return None
 		FeatureValues = dict()
 		for Feature in DumpFeatures:
 			FeatureValues[Feature] = PopDump(Feature)
@@ -63,31 +112,47 @@ class Global(Parameters.Parameters):
 		Test = FeatureValues[DumpFeatures[0]]
 		# OldStyle: [Feature, AgentOfLowestCompetence' feature value, AgentOfNextCompetence' feature value, ...]
 		# NewStyle: [(Competence1, FeatureValue1), (Competence2, FeatureValue2), ...]
-		OldStyle = (len(Test) > 2 and type(Test[1]) == str and re.match(r'[0-9\.]+', Test[1]))
+		OldStyle = bool(len(Test) > 2 and type(Test[1]) == str and re.match(r'[0-9\.]+', Test[1]))
 		if OldStyle:
-			Qualities = list(range(len(FeatureValues[Feature])-1))
 			for Feature in DumpFeatures:
 				FeatureValues[Feature] = FeatureValues[Feature][1:]
+			return (True, list(DumpFeatures), [list(FeatureValues[f]) for f in DumpFeatures])
 		else:	# not used
 			Qualities = sorted([x[0] for x in Test])
 			for Feature in DumpFeatures:
 				Values = dict(FeatureValues[Feature])
 				FeatureValues[Feature] = [Values[q] for q in Qualities]	# robust to duplicates
-		
+			return (False, ["Competence"] + list(DumpFeatures), 
+					[list(map(str, Qualities))] + [FeatureValues[f] for f in DumpFeatures])
+
+	def DumpRows(self, PopDump=None, DumpFeatures=None, Columns=None):
+		"""	Returns agents' features as a list of rows (lists of strings):
+			OldStyle: one row per feature
+			NewStyle: a header row and then one row per competence value
+			Columns, if provided, is the output of DumpColumns
+		"""
+		if Columns is None:	Columns = self.DumpColumns(PopDump, DumpFeatures)
+		if Columns is None:	return []
+		(OldStyle, Names, Values) = Columns
+		if OldStyle:
+			# ====== an empty column still yields 'Feature;' as in the original format
+			return [[Name] + (Column or ['']) for (Name, Column) in zip(Names, Values)]
+		else:	#NewStyle, 	not used
+			return [Names] + [list(R) for R in zip(*Values)]
+
+	def DumpMerged(self, Runs, ResultFileName, ExpeID, Verbose=False):
+		"""	Saves rows produced by several runs (see StartReplicates) into a single file.
+			Runs: list of (RunId, Overrides, Seed, Rows). Each row is prefixed with run identifiers.
+		"""
 		DumpFileName = ResultFileName + '_dmp.csv'
 		if Verbose:	print("Saving data to", DumpFileName)
+		Names = list(Runs[0][1].keys()) if Runs else []
 		SNResultFile = open(DumpFileName, 'w')
 		SNResultFile.write('#%s\n' % ExpeID)
-		if OldStyle:
-			for Feature in DumpFeatures:
-				SNResultFile.write(f"{Feature};")
-				SNResultFile.write(";".join(FeatureValues[Feature]))
-				SNResultFile.write("\n")	  
-		else:	#NewStyle, 	not used
-			Records = zip(map(str, Qualities), *[FeatureValues[f] for f in DumpFeatures])
-			SNResultFile.write("Competence;" + ";".join(DumpFeatures) + "\n")
-			for R in Records:
-				SNResultFile.write(";".join(R) + "\n")
+		SNResultFile.write(";".join(['Run', 'Seed'] + Names + ['Data']) + "\n")
+		for (RunId, Overrides, Seed, Rows) in Runs:
+			Prefix = [str(RunId), str(Seed)] + [str(Overrides[N]) for N in Names]
+			for Row in Rows:	SNResultFile.write(";".join(Prefix + Row) + "\n")
 		SNResultFile.close()
 		
 	# def Param(self, ParameterName):	return self.Parameters.Parameter(ParameterName)
@@ -227,6 +292,15 @@ class Social_Population:
 					parameters=parameters) for IdNb in range(NbAgents)]
 		self.Param = parameters.Param
 		self.NbGroup = parameters.Parameter('NumberOfGroups', Default=1)	# number of groups
+		# ====== neighbourhood windows (positions of neighbours in Pop) for each position
+		self.Windows = [tuple(NBhood for NBhood in (Rank - 1, Rank + 1) if NBhood >= 0 and NBhood < self.PopSize) 
+							for Rank in range(self.PopSize)]
+		self.reindex()
+
+	def reindex(self):
+		"""	recomputes agents' positions in Pop
+		"""
+		self.Rank = {A: Rank for (Rank, A) in enumerate(self.Pop)}
 				 
 	def positions(self):	
 		"""	returns the list of agents' locations
@@ -236,9 +310,11 @@ class Social_Population:
 	def neighbours(self, Agent):
 		"""	Returns agents of neighbouring qualitied 
 		"""
-		AgentCompetenceRank = self.Pop.index(Agent)
-		return [self.Pop[NBhood] for NBhood in [AgentCompetenceRank - 1, AgentCompetenceRank + 1]
-				if NBhood >= 0 and NBhood < self.PopSize]
+		AgentCompetenceRank = self.Rank.get(Agent)
+		if AgentCompetenceRank is None or self.Pop[AgentCompetenceRank] is not Agent:
+			self.reindex()	# Pop has been reordered or modified
+			AgentCompetenceRank = self.Rank[Agent]
+		return [self.Pop[NBhood] for NBhood in self.Windows[AgentCompetenceRank]]
 		  
 	def FeatureAvg(self, Feature):
 		"""	average value of Feature's value
@@ -295,13 +371,22 @@ class Social_Population:
 		return self.encounters(group, NbInteractions=NbInteractions, systematic=True, shuffle=shuffle)
 	'''
 	
-	def encounters(self, group=None, NbInteractions=None, shuffle=True):
+	def encounters(self, group=None, NbInteractions=None, shuffle=True, Mode=None):
 		"""	NbInteractions is the number of encounters per individual (on average if non systematic)
+			Mode (parameter 'EncounterMode') may be:
+			- 'pairs' (default): all ordered pairs if NbInteractions is an int, random pairs otherwise
+			- 'matching' or 'regular': the whole run's pairings are drawn at once (see 'pairings')
+			Encounters are drawn from random stream 'Encounters'
 		"""
 		if group is None: group = self.Pop
 
 		if NbInteractions is None:
 			NbInteractions = self.Param('NbInteractions', default=1)
+		if Mode is None:
+			Mode = self.Param('EncounterMode', default='pairs')
+		if Mode != 'pairs':
+			yield from self.pairings(group, Mode, NbInteractions)
+			return
 		systematic = (type(NbInteractions) == int)
 		if not systematic:
 			assert type(NbInteractions) == float
@@ -309,7 +394,7 @@ class Social_Population:
 		
 		if systematic:
 			# Pairs = list(it.product(group, repeat=2))	# cartesian product group x group
-			ShuffledGroup = random.sample(group, len(group)) if shuffle else group
+			ShuffledGroup = RandomStreams.stream('Encounters').sample(group, len(group)) if shuffle else group
 			for Player in group:
 				for Partner in ShuffledGroup:
 					if Player != Partner:	yield Player, Partner
@@ -321,19 +406,55 @@ class Social_Population:
 		else:
 			assert shuffle, "Random encounters implements shuffling"
 			# ====== randomly picking interacting pairs
+			Rnd = RandomStreams.stream('Encounters')
 			for _ in range(NbInteractions):
-				yield random.sample(group, 2)
+				yield Rnd.sample(group, 2)
+
+	def pairings(self, group, Mode, NbInteractions):
+		"""	draws all encounters of a run in bulk, as a list of (Player, Partner).
+			Each individual takes part in about NbInteractions encounters in 'matching' mode
+			(random perfect matchings) and in exactly 2 * NbInteractions in 'regular' mode
+			(each individual, in random order, meets the individual located Shift places further).
+		"""
+		Pairs = []
+		if len(group) < 2:	return Pairs
+		Rnd = RandomStreams.stream('Encounters')
+		for _ in range(max(1, round(NbInteractions))):
+			Order = Rnd.sample(group, len(group))
+			if Mode == 'matching':
+				Pairs += zip(Order[0::2], Order[1::2])
+			elif Mode == 'regular':
+				Shift = Rnd.randint(1, len(group) - 1)
+				Pairs += zip(Order, Order[Shift:] + Order[:Shift])
+			else:	Tools.error('SocialSimulation', f'Unknown encounter mode: {Mode}')
+		return Pairs
 		
 	def interactions(self, group=None, shuffle=True):
-		"""	interactions occur within a group 
+		"""	interactions occur within a group.
+			If parameter 'EncounterBlock' is set, encounters are processed by blocks through 'interact_block'
 		"""
-		for Player, Partner in self.encounters(group, shuffle=shuffle):
+		Encounters = self.encounters(group, shuffle=shuffle)
+		BlockSize = self.Param('EncounterBlock', default=0)
+		if BlockSize:
+			Block = list(it.islice(Encounters, BlockSize))
+			while Block:
+				self.interact_block(Block)
+				Block = list(it.islice(Encounters, BlockSize))
+			return
+		for Player, Partner in Encounters:
 			Player.interact(Partner)
 			# global I
 			# try:	I += 1
 			# except NameError:	I = 0
 			# print(I)
 		# print(f'/{self.Obs.StepId}')
+
+	def interact_block(self, Pairs):
+		"""	processes a block of encounters (list of (Player, Partner)).
+			To be overloaded by applications able to evaluate many encounters at once
+		"""
+		for Player, Partner in Pairs:
+			Player.interact(Partner)
 	
 	def learning(self):
 		"""	called at each 'run', several times per year 
@@ -343,7 +464,8 @@ class Social_Population:
 		for agent in self:	# now cross-benefits are completed
 			agent.wins(agent.Points)	# Stores points for learning
 		# ------ some agents learn
-		Learners = random.sample(self.Pop, Tools.chances(self.Param('LearningProbability')/100.0, len(self.Pop)))	
+		Rnd = RandomStreams.stream('Learning', 'Learners')
+		Learners = Rnd.sample(self.Pop, Tools.chances(self.Param('LearningProbability')/100.0, len(self.Pop), Rnd=Rnd))	
 		for agent in Learners:
 			agent.Learns(self.neighbours(agent), hot=self.Obs.hot_phase())
 			# agent.update()	# update location for display
@@ -369,7 +491,7 @@ class Social_Population:
 			GroupLength = max(1, len(self.Pop) // self.NbGroup)
 			if self.NbGroup > 1:
 				Pop = self.Pop[:] 
-				random.shuffle(Pop)
+				RandomStreams.stream('Encounters', 'Groups').shuffle(Pop)
 			else:	Pop = self.Pop
 			for groupID in range(self.NbGroup):	# interaction only within groups
 				group = Pop[groupID * GroupLength: (groupID + 1) * GroupLength]
@@ -396,11 +518,86 @@ class Social_Population:
 		
 
 		
-def Start(Params=None, PopClass=Social_Population, ObsClass=Social_Observer, DumpFeatures=None, Windows='FNC'):
+_REPLICATION = None	# (Params, PopClass, ObsClass, DumpFeatures, Setup, ResultFile), inherited by replicate processes
+
+def _replicate(Run):
+	"""	performs one run in batch mode (see StartReplicates) on its own copy of parameters.
+		Returns (RunId, Overrides, Seed, Status, Rows), Status being 'ok' or an error message
+	"""
+	(RunId, Overrides, Seed) = Run
+	(BaseParams, PopClass, ObsClass, DumpFeatures, Setup, ResultFile) = _REPLICATION
+	Params = copy.deepcopy(BaseParams)	# runs performed in the same process do not share parameters
+	try:
+		for (Name, Value) in Overrides.items():	Params.addParameter(Name, Value)
+		Params.addParameter('RandomSeed', Seed)
+		Params.addParameter('BatchMode', 1)
+		Params.setErrorPolicy()	# never waits for keyboard
+		Tools.ErrorContext['Run'] = RunId
+		if Setup is not None:	Setup(Params)	# Setup may rebind the application's global parameters to this copy
+		RandomStreams.seed(Params['RandomSeed'], Params)
+		Observer_ = ObsClass(Params)
+		Observer_.setOutputDir('___Results')
+		Observer_.recordInfo('ResultFile', f"{ResultFile}_run{RunId}")	# runs may start simultaneously
+		Pop = PopClass(Params, Params['NbAgents'], Observer_)
+		Observer_.recordInfo('DumpFeatures', DumpFeatures)
+		from Evolife.Graphics import Evolife_Batch
+		(Step, Observer_) = Evolife_Batch.Start(Pop.One_Run, Observer_)
+		Pop = Step.__self__	# differs from the initial population when resuming from a checkpoint
+		Rows = Params.DumpRows(Pop.Dump, DumpFeatures)
+		Pop.close(Verbose=False)
+		return (RunId, Overrides, Seed, 'ok', Rows)
+	except (Exception, SystemExit) as Msg:	return (RunId, Overrides, Seed, f'error: {Msg}'.replace('\n', ' '), [])
+
+def StartReplicates(Params, PopClass=Social_Population, ObsClass=Social_Observer, DumpFeatures=None, Setup=None):
+	"""	Launches independent runs in batch mode, in parallel on local cores:
+		'Replicates' runs for each combination of values in 'Sweep', 
+		a dictionary such as {'MaxFriends': [2, 4, 8], 'NbRunPerYear': [5, 10]}.
+		Each run gets its own seed (RandomSeed + run number), its own copy of Params 
+		and writes its own result file.
+		Feature dumps of successful runs are merged into one _dmp.csv file with run identifiers.
+		Setup, if provided, is called with the run's copy of Params once parameters are set.
+		Runs are performed sequentially where processes cannot be forked.
+		Returns the list of (RunId, Overrides, Seed, Status, Rows)
+	"""
+	global _REPLICATION
+	import multiprocessing
+	Sweep = Params.Parameter('Sweep', Default=dict())
+	if type(Sweep) != dict:	Tools.error('SocialSimulation', f'Sweep should be a dictionary of lists, not {Sweep}')
+	Names = list(Sweep.keys())
+	Combinations = list(it.product(*[Sweep[N] for N in Names]))
+	Replicates = max(1, Params.Parameter('Replicates', Default=1))
+	BaseSeed = RandomStreams.seed(Params.Parameter('RandomSeed', Default=0))	# drawn if absent
+	Runs = [(RunId, dict(zip(Names, Values)), BaseSeed + RunId) 
+				for (RunId, (Values, R)) in enumerate(it.product(Combinations, range(Replicates)))]
+	# ====== result files share a name computed once (see Experiment_Observer)
+	ExperienceID = strftime("%y%m%d%H%M%S")
+	ResultFile = os.path.join('___Results', f"___{Params['ScenarioName']}_{ExperienceID}_{socket.gethostname().split('.')[0]}")
+	_REPLICATION = (Params, PopClass, ObsClass, DumpFeatures, Setup, ResultFile)
+	Workers = Params.Parameter('Workers', Default=0) or os.cpu_count() or 1
+	try:	Context = multiprocessing.get_context('fork')
+	except ValueError:	Context = None	# no fork (e.g. on Windows)
+	print(f'{len(Runs)} runs on {Workers if Context else 1} process(es)')
+	if Context is None or Workers == 1:	Results = [_replicate(Run) for Run in Runs]
+	else:
+		with Context.Pool(min(Workers, len(Runs))) as Pool:
+			Results = Pool.map(_replicate, Runs, chunksize=1)
+	for (RunId, Overrides, Seed, Status, Rows) in Results:
+		if Status != 'ok':	print(f'run {RunId} {Overrides} (seed {Seed}): {Status}')
+	Successes = [(RunId, Overrides, Seed, Rows) for (RunId, Overrides, Seed, Status, Rows) in Results if Status == 'ok']
+	if DUMPSTATE and DumpFeatures and Successes:
+		Params.DumpMerged(Successes, ResultFile, ExperienceID)
+	return Results
+		
+def Start(Params=None, PopClass=Social_Population, ObsClass=Social_Observer, DumpFeatures=None, Windows='FNC', Setup=None):
 	"""	Launches the simulation
+		(several simulations in parallel if parameters 'Replicates' or 'Sweep' are set, see StartReplicates)
 	"""
 	if Params is None:	Params = Global()
-	if Params.get('RandomSeed', 0) > 0:	random.seed(Params['RandomSeed'])
+	Params.setErrorPolicy()
+	if Params.Parameter('Replicates', Default=1) > 1 or Params.Parameter('Sweep', Default=None):
+		StartReplicates(Params, PopClass=PopClass, ObsClass=ObsClass, DumpFeatures=DumpFeatures, Setup=Setup)
+		return
+	RandomStreams.seed(Params.get('RandomSeed', 0), Params)	# drawn and recorded if absent
 	Observer_ = ObsClass(Params)   # Observer contains statistics
 	Observer_.setOutputDir('___Results')
 	Views = Observer_.getInfo('DefaultViews', default=[])
@@ -432,7 +629,8 @@ def Start(Params=None, PopClass=Social_Population, ObsClass=Social_Observer, Dum
 			# # # # #print '.',
 			# # # # Pop.One_Run()
 			# # # # if os.path.exists('stop'):	break
-		Evolife_Batch.Start(Pop.One_Run, Observer_)
+		(Step, Observer_) = Evolife_Batch.Start(Pop.One_Run, Observer_)
+		Pop = Step.__self__	# differs from the initial population when resuming from a checkpoint
 	else:
 		from Evolife.Graphics import Evolife_Window
 		####################
@@ -446,7 +644,7 @@ def Start(Params=None, PopClass=Social_Population, ObsClass=Social_Observer, Dum
 		except Exception as Msg:
 			from sys import excepthook, exc_info
 			excepthook(exc_info()[0],exc_info()[1],exc_info()[2])
-			input('[Entree]')
+			Tools.pause('[Entree]')
 		
 	if DUMPSTATE:
 		# saving population state
@@ -465,7 +663,6 @@ def Start(Params=None, PopClass=Social_Population, ObsClass=Social_Observer, Dum
 
 if __name__ == "__main__":
 	Gbl = Global()
-	if Gbl['RandomSeed'] > 0:	random.seed(Gbl['RandomSeed'])
 	Start(Gbl)
 
 
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+""" @brief  Named, independently seeded random streams.
+"""
+
+#============================================================================#
+# EVOLIFE  http://evolife.telecom-paris.fr             Jean-Louis Dessalles  #
+# Telecom Paris  2025-11-16                                www.dessalles.fr  #
+# -------------------------------------------------------------------------- #
+# License:  Creative Commons BY-NC-SA                                        #
+#============================================================================#
+# Documentation: https://evolife.telecom-paris.fr/Classes/annotated.html     #
+#============================================================================#
+
+
+##############################################################################
+#  Random streams                                                            #
+##############################################################################
+
+"""	stream('Mating') or stream('Group', 3, 'Mutation') returns a random generator
+	whose seed depends only on the master seed and on the stream's name.
+	Draws on one stream therefore do not depend on draws on other streams,
+	on the order in which streams are created, or on the process that runs them.
+
+	The master seed is RandomSeed from the configuration. When RandomSeed is absent or null,
+	a master seed is drawn and stored back as RandomSeed, so that it is recorded in results.
+	A stream's seed may be set explicitly with a parameter RandomSeed_<name>,
+	e.g. 'RandomSeed_Group_3_Mutation	12'.
+
+	Streams used by Evolife itself:
+	- 'Genetics_Init', 'Genetics_Crossover', 'Genetics_Mutation' (default DNA streams),
+	  'Group_<ID>_Crossover', 'Group_<ID>_Mutation', 'Group_<ID>_Ranking' (one set per group),
+	- 'Population_Selection', 'Population_Lottery', 'Population_Migration', 'Population_Splitting', 'Population_Limit',
+	- 'Individual_Age', 'Individual_ID', 'Phenotype',
+	- 'Scenario_<phase>' (see Default_Scenario.stream, e.g. 'Scenario_Partners', 'Scenario_Couples'),
+	- 'Encounters', 'Encounters_Groups', 'Learning', 'Learning_Learners', 'Alliances_Ties' (Social simulations).
+
+	Python's global random module remains the default stream, seeded with the master seed,
+	for code that does not use streams (e.g. applications in Apps).
+"""
+
+import random
+import hashlib
+
+MasterSeed = 0
+SeedOverrides = {}	# explicit stream seeds read from configuration
+Streams = {}	# stream name --> random.Random instance
+
+def streamName(Names):
+	return '_'.join(map(str, Names))
+
+def deriveSeed(Seed, Name):
+	"""	Computes a stream seed from the master seed and the stream name
+		(hashlib rather than hash(), which is salted differently in each process)
+	"""
+	return int.from_bytes(hashlib.sha256(f'{Seed}/{Name}'.encode()).digest()[:8], 'little')
+
+def newSeed():
+	"""	Draws a master seed from system entropy
+	"""
+	return random.SystemRandom().randint(1, 2**31 - 1)
+
+def seed(Seed=0, Params=None):
+	"""	Sets the master seed (drawn at random if Seed <= 0), seeds Python's global random module
+		and discards existing streams.
+		If Params is given, the actual seed is stored there as RandomSeed
+		and parameters RandomSeed_<name> are read as explicit stream seeds.
+		Returns the master seed.
+	"""
+	global MasterSeed
+	if Seed <= 0:	Seed = newSeed()
+	MasterSeed = Seed
+	random.seed(Seed)
+	SeedOverrides.clear()
+	Streams.clear()
+	if Params is not None:
+		if Params.get('RandomSeed', 0) != Seed:	Params.addParameter('RandomSeed', Seed)
+		Params.Parameter('RandomSeed')	# makes it relevant, i.e. recorded in results
+		for Name in Params:
+			if Name.startswith('RandomSeed_'):
+				SeedOverrides[Name[len('RandomSeed_'):]] = Params.Parameter(Name)
+	return Seed
+
+def stream(*Names):
+	"""	Returns the random generator named after Names, creating it if necessary
+	"""
+	Name = streamName(Names)
+	if Name not in Streams:
+		Streams[Name] = random.Random(SeedOverrides.get(Name, deriveSeed(MasterSeed, Name)))
+	return Streams[Name]
+
+def getstate():
+	"""	Returns the state of all streams (including the global one), e.g. for checkpoints.
+		Streams are stored as objects, so that an object holding a stream and pickled
+		together with this state still shares it after unpickling.
+	"""
+	return {'MasterSeed': MasterSeed, 'SeedOverrides': dict(SeedOverrides),
+			'Streams': Streams, 'Global': random.getstate()}
+
+def setstate(State):
+	"""	Restores a state returned by getstate
+	"""
+	global MasterSeed, SeedOverrides, Streams
+	MasterSeed = State['MasterSeed']
+	SeedOverrides = State['SeedOverrides']
+	Streams = State['Streams']
+	random.setstate(State['Global'])
+
+
+if __name__ == "__main__":
+	print(__doc__)
+	seed(1)
+	print([stream('A').randint(0, 9) for _ in range(10)])
+	seed(1)
+	stream('B').random()	# does not affect stream A
+	print([stream('A').randint(0, 9) for _ in range(10)])
+
+__author__ = 'Dessalles'
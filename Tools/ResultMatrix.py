@@ -58,6 +58,7 @@ Note: the elimination of constant columns can be made once only:
 import sys
 import re
 import os
+from array import array
 ##import math
 ##import dislin
 import getopt
@@ -499,6 +500,29 @@ def transpose(M):
 		for j in range(len(M[0])):
 			R[j][i] = M[i][j]
 	return R
+
+def LoadColumns(DumpFileName, Features=None):
+	"""	reads back agents' features saved in binary columnar form
+		(see Global.DumpBinary_ in Social/SocialSimulation.py).
+		DumpFileName: either <ResultFile>_dmp.bin or <ResultFile>_dmp_idx.csv
+		Returns a dictionary {Feature: array of floats}, NaN standing for blank values.
+		Only the columns listed in Features (if given) are loaded.
+	"""
+	Base = re.sub(r'(_dmp)?(_idx\.csv|\.bin)$', '', DumpFileName)
+	Index = open(Base + '_dmp_idx.csv')
+	Entries = [L.strip().split(';') for L in Index.readlines()[1:] if L.strip()]
+	Index.close()
+	Columns = dict()
+	BinFile = open(Base + '_dmp.bin', 'rb')
+	for (Feature, Offset, Count) in Entries:
+		if Features is not None and Feature not in Features:	continue
+		Column = array('d')
+		BinFile.seek(int(Offset) * Column.itemsize)
+		Column.fromfile(BinFile, int(Count))
+		if sys.byteorder != 'little':	Column.byteswap()
+		Columns[Feature] = Column
+	BinFile.close()
+	return Columns
 			
 	
 def main():
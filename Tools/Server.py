@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+""" @brief  Warm simulation server: runs batch jobs sent through a local socket
+			without paying for interpreter start, imports and configuration parsing.
+"""
+
+#============================================================================#
+# EVOLIFE  http://evolife.telecom-paris.fr             Jean-Louis Dessalles  #
+# Telecom Paris  2025-11-16                                www.dessalles.fr  #
+# -------------------------------------------------------------------------- #
+# License:  Creative Commons BY-NC-SA                                        #
+#============================================================================#
+# Documentation: https://evolife.telecom-paris.fr/Classes/annotated.html     #
+#============================================================================#
+
+
+##############################################################################
+#  Simulation server                                                         #
+##############################################################################
+
+"""	The server loads simulation modules and parses configuration files once,
+	then listens on a Unix domain socket (readable by its owner only).
+	A client sends a list of jobs, i.e. dictionaries such as:
+		{'Config': 'SexRatio.evo', 'Overrides': {'MutationRate': 5}, 'Seed': 12, 'Run': 3, 'Timeout': 60}
+	('Config' may also be a dictionary of parameters).
+	Jobs without 'Timeout' are limited to the server's default timeout (in seconds, 0: none).
+	Each connection is served by a forked process, and each job runs in batch mode
+	in a fresh process forked from it, so that runs never share state.
+	A job runs in the directory of its configuration file, so that relative paths
+	in the configuration (e.g. ResultDir) are resolved as if the file were run there.
+	Results are sent back as soon as each job is over:
+		{'Run': 3, 'Seed': 12, 'Overrides': {...}, 'Status': 'ok', 'Summary': [(name, value), ...]}
+	and a final None closes the list.
+	Simultaneous connections (at most Workers) run in parallel.
+	Each connection process leads a process group including its jobs, 
+	which is terminated when the server stops.
+"""
+
+import sys
+import os
+import signal
+import getopt
+from multiprocessing.connection import Listener, Client, wait
+
+if __name__ == '__main__':  sys.path.append('../..')  # for tests
+
+from Evolife.Tools.Tools import error, errorPolicy
+from Evolife.Tools import Sweep
+from Evolife.Tools import RandomStreams
+
+ADDRESS = 'evolife.sock'
+TIMEOUT = 3600	# default job duration limit, in seconds
+
+
+class Server:
+	"""	Listens on Address and runs jobs in forked processes
+	"""
+	def __init__(self, Address=ADDRESS, Workers=0, Configs=(), Timeout=TIMEOUT):
+		self.Address = Address
+		self.Workers = Workers or os.cpu_count() or 1
+		self.Timeout = Timeout	# for jobs that do not specify theirs
+		self.Children = set()	# one process per connection
+		Sweep.preload()
+		from Evolife.Scenarii.Parameters import Parameters
+		for CfgFile in Configs:	Parameters(CfgFile)	# parsed configurations are cached and inherited by children
+		if os.path.exists(Address):
+			try:
+				Client(Address).close()
+				error('Server', f'A server is already listening on {Address}')
+			except (ConnectionError, FileNotFoundError):	os.unlink(Address)	# stale socket
+		Mask = os.umask(0o077)	# jobs are pickled: only the owner may connect
+		try:	self.Listener = Listener(Address, family='AF_UNIX')
+		finally:	os.umask(Mask)
+
+	def reap(self, Block=False):
+		"""	Collects terminated connection processes
+			(waits for one if Block is True)
+		"""
+		while self.Children:
+			(Pid, Status) = os.waitpid(-1, 0 if Block else os.WNOHANG)
+			if Pid == 0:	break
+			self.Children.discard(Pid)
+			Block = False
+
+	def serve(self):
+		"""	Accepts connections until interrupted
+		"""
+		signal.signal(signal.SIGTERM, lambda Signal, Frame: sys.exit(0))
+		print(f'Evolife server listening on {self.Address} ({self.Workers} worker(s))')
+		try:
+			while True:
+				if len(self.Children) >= self.Workers:	self.reap(Block=True)
+				Conn = self.Listener.accept()
+				self.reap()
+				Pid = os.fork()
+				if Pid == 0:
+					Status = 1
+					try:
+						os.setpgid(0, 0)	# jobs will belong to this process group
+						self.handle(Conn)
+						Status = 0
+					finally:	os._exit(Status)	# no cleanup: the socket belongs to the server
+				try:	os.setpgid(Pid, Pid)	# in case the child has not done it yet
+				except OSError:	pass	# already done (or child already over)
+				Conn.close()
+				self.Children.add(Pid)
+		except (KeyboardInterrupt, SystemExit):	pass
+		finally:
+			self.Listener.close()	# also removes the socket file
+			for Pid in self.Children:	
+				try:	os.killpg(Pid, signal.SIGTERM)	# connection process and its jobs
+				except ProcessLookupError:	pass
+			print('Evolife server stopped')
+
+	def handle(self, Conn):
+		"""	Runs the jobs received on Conn one after the other and sends back their results
+		"""
+		signal.signal(signal.SIGINT, signal.SIG_IGN)	# interruptions are handled by the server
+		signal.signal(signal.SIGTERM, signal.SIG_DFL)
+		errorPolicy('log')	# never waits for keyboard
+		for Job in Conn.recv():
+			Job = dict(Job, Seed=self.jobSeed(Job))	# also reported if the job process dies
+			Pid = os.fork()
+			if Pid == 0:
+				Status = 1
+				try:
+					Conn.send(self.runJob(Job))
+					Status = 0
+				finally:	os._exit(Status)
+			(Pid, Status) = os.waitpid(Pid, 0)
+			if Status:	# the job process died without answering
+				Conn.send({'Run': Job.get('Run', 0), 'Seed': Job.get('Seed', 0), 'Overrides': Job.get('Overrides', {}),
+						   'Status': 'lost', 'Summary': []})
+		Conn.send(None)
+		Conn.close()
+
+	def jobSeed(self, Job):
+		"""	Seed used by Job: its 'Seed', or else RandomSeed from its overrides or configuration,
+			or else a seed drawn now, so that it is known even if the job fails
+		"""
+		from Evolife.Scenarii.Parameters import Parameters
+		Seed = Job.get('Seed')
+		if Seed is None:
+			try:
+				Cfg = Job['Config']
+				Cfg = Cfg if isinstance(Cfg, dict) else Parameters(os.path.abspath(Cfg))
+				Seed = Job.get('Overrides', {}).get('RandomSeed', Cfg.get('RandomSeed', 0))
+			except (Exception, SystemExit):	Seed = 0	# the error will be reported by runJob
+		return Seed if Seed > 0 else RandomStreams.newSeed()
+
+	def runJob(self, Job):
+		"""	Runs one job in the current (forked) process, 
+			from the directory of its configuration file (see module doc)
+		"""
+		from Evolife.Scenarii.Parameters import Parameters
+		(RunId, Overrides) = (Job.get('Run', 0), Job.get('Overrides', {}))
+		errorPolicy('log')	# never waits for keyboard
+		Seed = self.jobSeed(Job)
+		try:
+			Cfg = Job['Config']
+			if not isinstance(Cfg, dict):
+				Cfg = os.path.abspath(Cfg)
+				os.chdir(os.path.dirname(Cfg))	# relative paths in the configuration refer to its location
+			Cfg = dict(Cfg) if isinstance(Cfg, dict) else dict(Parameters(Cfg))
+		except (Exception, SystemExit) as Msg:
+			return {'Run': RunId, 'Seed': Seed, 'Overrides': Overrides, 'Status': f'error: {Msg}', 'Summary': []}
+		Cfg.update(Overrides)
+		Cfg.update({'RandomSeed': Seed, 'BatchMode': 1, 'StopFile': 0})
+		(RunId, Status, Summary) = Sweep.run((RunId, Cfg, Job.get('Timeout', self.Timeout)))
+		return {'Run': RunId, 'Seed': Seed, 'Overrides': Overrides, 'Status': Status, 'Summary': Summary}
+
+
+def submit(Jobs, Address=ADDRESS, Connections=0):
+	"""	Sends Jobs to the server listening on Address, spread over Connections
+		simultaneous connections (0: one per core), and yields results as they arrive
+	"""
+	Jobs = list(Jobs)
+	Connections = min(Connections or os.cpu_count() or 1, len(Jobs))
+	Pending = []
+	for C in range(Connections):
+		Conn = Client(Address, family='AF_UNIX')
+		Conn.send(Jobs[C::Connections])
+		Pending.append(Conn)
+	while Pending:
+		for Conn in wait(Pending):
+			Result = Conn.recv()
+			if Result is None:
+				Conn.close()
+				Pending.remove(Conn)
+			else:	yield Result
+
+def usage(Command):
+	print(f"""\nUsage:
+	{Command} [-a <socket>] [-w <workers>] [-t <default timeout in seconds>] [<Config.evo> ...]
+		starts a server, with configuration files parsed in advance (default timeout: {TIMEOUT}s, 0: none)
+	{Command} [-a <socket>] [-w <connections>] [-t <timeout in seconds>] -s <Base.evo> [-r <runs>] [-o <output prefix>]
+		sends runs of Base.evo with successive seeds (RandomSeed + run number) to the server
+		and writes their '_res' summaries into <prefix>_server.csv
+		(results are stored where Base.evo would store them if run from its own directory)
+	""")
+
+def main():
+	try:	(Options, Args) = getopt.gnu_getopt(sys.argv[1:], 'ha:w:t:s:r:o:')
+	except getopt.GetoptError:	Options, Args = [('-h', '')], []
+	Options = dict(Options)
+	if '-h' in Options:
+		usage(os.path.basename(sys.argv[0]))
+		return
+	Address = Options.get('-a', ADDRESS)
+	Workers = int(Options.get('-w', 0))
+	if '-s' not in Options:
+		Server(Address, Workers, Args, Timeout=float(Options.get('-t', TIMEOUT))).serve()
+		return
+	from Evolife.Scenarii.Parameters import Parameters
+	BaseFile = os.path.abspath(Options['-s'])	# the server may run elsewhere
+	BaseSeed = Parameters(BaseFile).Parameter('RandomSeed', Default=0) or 1
+	Jobs = [{'Config': BaseFile, 'Seed': BaseSeed + RunId, 'Run': RunId} for RunId in range(int(Options.get('-r', 1)))]
+	if '-t' in Options:
+		for Job in Jobs:	Job['Timeout'] = float(Options['-t'])
+	Table = []
+	for Result in submit(Jobs, Address, Workers):
+		print(f"run {Result['Run']}: {Result['Status']}")
+		Table.append((Result['Run'], Result['Seed'], Result['Overrides'], Result['Status'], Result['Summary']))
+	Prefix = Options.get('-o', os.path.splitext(os.path.basename(BaseFile))[0])
+	Sweep.SaveTable(sorted(Table, key=lambda R: R[0]), Prefix + '_server.csv')
+	print(f'------- {Prefix}_server.csv has been created')
+
+if __name__ == "__main__":
+	main()
+
+
+__author__ = 'Dessalles'
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+""" @brief  Parameter sweeps: runs many configurations of a scenario in parallel
+			and gathers their results into a single table.
+"""
+
+#============================================================================#
+# EVOLIFE  http://evolife.telecom-paris.fr             Jean-Louis Dessalles  #
+# Telecom Paris  2025-11-16                                www.dessalles.fr  #
+# -------------------------------------------------------------------------- #
+# License:  Creative Commons BY-NC-SA                                        #
+#============================================================================#
+# Documentation: https://evolife.telecom-paris.fr/Classes/annotated.html     #
+#============================================================================#
+
+
+##############################################################################
+#  Parameter sweeps                                                          #
+##############################################################################
+
+"""	A sweep starts from a base configuration file (.evo) and a specification
+	such as {'MutationRate': [1, 2, 5], 'PopulationSize': (100, 400)}:
+	- 'grid':	every combination of listed values ((low, high) integer ranges are enumerated)
+	- 'random':	Samples configurations drawn uniformly within (low, high) ranges
+				(or among listed values)
+	- 'lhs':	Samples configurations following a Latin hypercube within (low, high) ranges
+	Integer bounds yield integer values.
+	Each configuration is run Replicates times in batch mode, with seed RandomSeed + run number.
+	Runs are distributed over a pool of worker processes which are reused from one run to the next.
+	A run whose worker process dies is reported as 'lost'.
+	The '_res' summaries of all runs are gathered in <Prefix>_sweep.csv, one line per run.
+	
+	Replicate runs a single configuration until the confidence intervals 
+	of selected result columns are narrow enough.
+"""
+
+import sys
+import os
+import random
+import signal
+import time
+import itertools as it
+import getopt
+from statistics import NormalDist
+from queue import Queue, Empty
+
+if __name__ == '__main__':  sys.path.append('../..')  # for tests
+
+from Evolife.Tools.Tools import error, errorPolicy
+
+
+#########################################
+# Generating configurations             #
+#########################################
+
+SWEEPMODES = ('grid', 'random', 'lhs')
+
+def draw(Range, u):
+	"""	value within Range (list of values or (low, high)) at relative position u (0 <= u < 1)
+	"""
+	if isinstance(Range, list):	return Range[min(int(u * len(Range)), len(Range) - 1)]
+	(Low, High) = Range
+	if isinstance(Low, int) and isinstance(High, int):	return min(Low + int(u * (High - Low + 1)), High)
+	return Low + u * (High - Low)
+
+def configurations(Spec, Mode='grid', Samples=10, Seed=0):
+	"""	Returns a list of dictionaries {parameter name: value} following Spec (see module doc)
+	"""
+	Names = sorted(Spec)
+	for N in Names:
+		if not isinstance(Spec[N], (list, tuple)) or (isinstance(Spec[N], tuple) and len(Spec[N]) != 2):
+			error('Sweep', f'{N}: values should be given as a list or as a (low, high) range')
+	if Mode == 'grid':
+		Values = [Spec[N] if isinstance(Spec[N], list) else list(range(Spec[N][0], Spec[N][1] + 1))
+					for N in Names]
+		return [dict(zip(Names, V)) for V in it.product(*Values)]
+	Rnd = random.Random(Seed)	# configurations do not depend on simulation seeds
+	if Mode == 'random':
+		return [{N: draw(Spec[N], Rnd.random()) for N in Names} for S in range(Samples)]
+	if Mode == 'lhs':
+		# ====== each dimension is cut into Samples strata, each stratum being used once
+		Strata = dict()
+		for N in Names:
+			Strata[N] = list(range(Samples))
+			Rnd.shuffle(Strata[N])
+		return [{N: draw(Spec[N], (Strata[N][S] + Rnd.random()) / Samples) for N in Names}
+					for S in range(Samples)]
+	error('Sweep', f'unknown sweep mode: {Mode} (should be in {SWEEPMODES})')
+
+
+#########################################
+# Running configurations                #
+#########################################
+
+class RunTimeout(Exception):	pass
+
+def _timeout(Signal, Frame):	raise RunTimeout()
+
+def preload():
+	"""	Loads simulation modules so that runs start at once
+	"""
+	import Evolife.Scenarii.MyScenario
+	import Evolife.Ecology.Observer
+	import Evolife.Ecology.Population
+	import Evolife.Graphics.Evolife_Batch
+
+POLLPERIOD = 1	# seconds between checks for lost runs
+
+_STARTED = None	# queue through which workers declare the runs they perform
+
+def warmup(Started=None):
+	"""	Executed once by each worker
+	"""
+	global _STARTED
+	_STARTED = Started
+	preload()
+	signal.signal(signal.SIGINT, signal.SIG_IGN)	# interruptions are handled by the main process
+
+def tracked(Job):
+	"""	run(Job) in a worker, which first declares its process id (see lost)
+	"""
+	if _STARTED is not None:	_STARTED.put((Job[0], os.getpid()))
+	return run(Job)
+
+def alive(Pid):
+	if os.name != 'posix':	return True	# cannot be checked
+	try:	os.kill(Pid, 0)
+	except ProcessLookupError:	return False
+	return True
+
+def lost(InFlight, Started, Owners):
+	"""	Returns the runs in InFlight ({RunId: AsyncResult}) whose worker died without answering.
+		A dead worker is replaced by the pool, but the run it was performing never returns.
+		Owners ({RunId: process id}) is updated from the declarations sent through Started.
+	"""
+	while not Started.empty():
+		(RunId, Pid) = Started.get()
+		Owners[RunId] = Pid
+	Lost = []
+	for (RunId, Pend) in InFlight.items():
+		if RunId in Owners and not alive(Owners[RunId]):
+			Pend.wait(POLLPERIOD)	# the answer may have been sent just before dying
+			if not Pend.ready():	Lost.append(RunId)
+	return Lost
+
+def ResultSummary(ResFileName):
+	"""	Reads a '_res' file and returns a list of (name, value) pairs
+	"""
+	with open(ResFileName) as ResFile:
+		Lines = [L.strip() for L in ResFile.readlines() if L.strip()]
+	return list(zip(Lines[0].split(';'), Lines[-1].split(';')))
+
+def run(Job):
+	"""	Runs one configuration in batch mode in the current process.
+		Job = (RunId, Configuration, Timeout)
+		Returns (RunId, Status, Summary), Status being 'ok', 'timeout' or an error message
+	"""
+	(RunId, Cfg, Timeout) = Job
+	import Evolife.Scenarii.MyScenario as MyScenario
+	from Evolife.Ecology.Observer import EvolifeObserver
+	from Evolife.Ecology.Population import EvolifePopulation
+	from Evolife.Graphics import Evolife_Batch
+	Timer = hasattr(signal, 'setitimer') and Timeout
+	if Timer:
+		Previous = signal.signal(signal.SIGALRM, _timeout)
+		signal.setitimer(signal.ITIMER_REAL, Timeout)
+	try:
+		errorPolicy(Cfg.get('ErrorPolicy', 'log'), Cfg.get('ErrorLog'))	# never waits for keyboard
+		Name = Cfg['ScenarioName']
+		Scenario = MyScenario.InstantiateScenario(MyScenario.RetrieveScenarioClass(Name), Name, ParamDict=Cfg)
+		Obs = EvolifeObserver(Scenario)
+		Obs.recordInfo('ResultFile', f"{Obs.getInfo('ResultFile')}_run{RunId}")	# runs may start simultaneously
+		Pop = EvolifePopulation(Scenario, Obs)
+		Evolife_Batch.Start(Pop.one_year, Obs)
+		return (RunId, 'ok', ResultSummary(Obs.getInfo('ResultFile') + '_res.csv'))
+	except RunTimeout:	return (RunId, 'timeout', [])
+	except (Exception, SystemExit) as Msg:	return (RunId, f'error: {Msg}'.replace(';', ',').replace('\n', ' '), [])
+	finally:
+		if Timer:
+			signal.setitimer(signal.ITIMER_REAL, 0)
+			signal.signal(signal.SIGALRM, Previous)
+
+def Sweep(BaseFile, Spec, Mode='grid', Samples=10, Replicates=1, Workers=0, Timeout=0, Prefix=None, Verbose=True):
+	"""	Runs all configurations generated from Spec (see configurations) 'Replicates' times,
+		starting from parameters in BaseFile, on Workers processes (0: one per core).
+		Timeout (in seconds, 0: none) limits the duration of each run.
+		Returns the list of (RunId, Seed, Overrides, Status, Summary) and writes them into <Prefix>_sweep.csv
+	"""
+	import multiprocessing
+	from Evolife.Scenarii.Parameters import Parameters
+	Base = Parameters(BaseFile)
+	BaseSeed = Base.Parameter('RandomSeed', Default=0)
+	if BaseSeed <= 0:	BaseSeed = 1
+	Runs = []
+	for (RunId, (Overrides, R)) in enumerate(it.product(configurations(Spec, Mode, Samples, BaseSeed), range(Replicates))):
+		Cfg = dict(Base)
+		Cfg.update(Overrides)
+		Cfg.update({'RandomSeed': BaseSeed + RunId, 'BatchMode': 1, 'StopFile': 0})	# StopFile 0: single-threaded run
+		Runs.append((RunId, BaseSeed + RunId, Overrides, Cfg))
+	Workers = min(Workers or os.cpu_count() or 1, len(Runs))
+	if Verbose:	print(f'{len(Runs)} runs on {Workers} process(es)')
+	Jobs = [(RunId, Cfg, Timeout) for (RunId, Seed, Overrides, Cfg) in Runs]
+	try:	Context = multiprocessing.get_context('fork')
+	except ValueError:	Context = multiprocessing.get_context()
+	Results = dict()
+	# ====== runs whose worker dies are lost; with Timeout, runs still pending after Deadline are lost too 
+	# ====== (e.g. when blocked where the timer cannot interrupt them)
+	Deadline = time.monotonic() + Timeout * (len(Jobs) // Workers + 1) + 60
+	(Started, Owners) = (Context.SimpleQueue(), dict())
+	with Context.Pool(Workers, initializer=warmup, initargs=(Started,)) as Pool:
+		Pending = [(Job[0], Pool.apply_async(tracked, (Job,))) for Job in Jobs]
+		for (RunId, Pend) in Pending:
+			while RunId not in Results:
+				try:	Results[RunId] = Pend.get(timeout=POLLPERIOD)
+				except multiprocessing.TimeoutError:
+					if lost({RunId: Pend}, Started, Owners) or (Timeout and time.monotonic() > Deadline):
+						Results[RunId] = (RunId, 'lost', [])
+			if Verbose:	print(f'run {RunId}: {Results[RunId][1]}')
+		if any(R[1] == 'lost' for R in Results.values()):	Pool.terminate()
+	Table = [(RunId, Seed, Overrides, Results[RunId][1], Results[RunId][2]) for (RunId, Seed, Overrides, Cfg) in Runs]
+	if Prefix is None:	Prefix = os.path.splitext(os.path.basename(BaseFile))[0]
+	SaveTable(Table, Prefix + '_sweep.csv')
+	if Verbose:	print(f'------- {Prefix}_sweep.csv has been created')
+	return Table
+
+def SaveTable(Table, FileName):
+	"""	Writes one line per run: Run;Seed;Status;<swept parameters>;<'_res' columns>
+		Columns missing in a run's summary are left blank
+	"""
+	SweptNames = sorted(set([N for R in Table for N in R[2]]))
+	ResNames = []
+	for R in Table:
+		ResNames += [N for (N, V) in R[4] if N not in ResNames and N not in SweptNames]
+	with open(FileName, 'w') as Filout:
+		Lines = [';'.join(['Run', 'Seed', 'Status'] + SweptNames + ResNames)]
+		for (RunId, Seed, Overrides, Status, Summary) in Table:
+			Summary = dict(Summary)
+			Lines.append(';'.join([str(RunId), str(Seed), Status] + [str(Overrides.get(N, '')) for N in SweptNames]
+								  + [Summary.get(N, '') for N in ResNames]))
+		Filout.write('\n'.join(Lines) + '\n')
+
+
+#########################################
+# Replicates with confidence intervals  #
+#########################################
+
+def t_quantile(Confidence, DegreesOfFreedom):
+	"""	two-sided Student quantile (Cornish-Fisher expansion, accurate to 1% for 3 degrees of freedom or more)
+	"""
+	z = NormalDist().inv_cdf(0.5 + Confidence / 2)
+	n = DegreesOfFreedom
+	return (z + (z**3 + z) / (4*n) + (5*z**5 + 16*z**3 + 3*z) / (96*n**2)
+			+ (3*z**7 + 19*z**5 + 17*z**3 - 15*z) / (384*n**3)
+			+ (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z) / (92160*n**4))
+
+class RunningStat:
+	"""	mean and variance updated value by value (Welford's method)
+	"""
+	def __init__(self):
+		self.N = 0
+		self.Mean = 0.0
+		self.M2 = 0.0	# sum of squared deviations
+
+	def add(self, x):
+		self.N += 1
+		Delta = x - self.Mean
+		self.Mean += Delta / self.N
+		self.M2 += Delta * (x - self.Mean)
+
+	def halfwidth(self, Confidence=0.95):
+		"""	half width of the confidence interval of the mean
+		"""
+		if self.N < 2:	return float('inf')
+		return t_quantile(Confidence, self.N - 1) * (self.M2 / (self.N - 1) / self.N) ** 0.5
+
+MINREPLICATES = 4	# t_quantile is not reliable below
+
+def Replicate(BaseFile, Precision, Columns=None, Confidence=0.95, MinRuns=MINREPLICATES, MaxRuns=100, 
+			  Workers=0, Timeout=0, Prefix=None, Verbose=True):
+	"""	Runs the configuration in BaseFile with successive seeds (RandomSeed + run number), in parallel,
+		until the confidence interval of each column in Columns (by default: all curves in '_res' file)
+		has a half width below Precision, or until MaxRuns runs have been launched.
+		Results are taken into account in run order (results arriving early wait for previous runs),
+		so that the runs retained only depend on seeds, not on which worker finishes first.
+		Runs already launched when the precision is reached are completed but ignored.
+		Writes <Prefix>_replicates.csv (one line per run, then 'Mean' and 'HalfWidth' lines)
+		and returns {Column: (Mean, HalfWidth, NumberOfRuns)}
+	"""
+	import multiprocessing
+	from Evolife.Scenarii.Parameters import Parameters
+	Base = Parameters(BaseFile)
+	BaseSeed = Base.Parameter('RandomSeed', Default=0)
+	if BaseSeed <= 0:	BaseSeed = 1
+	MinRuns = max(MinRuns, MINREPLICATES)
+	MaxRuns = max(MaxRuns, MinRuns)
+	Workers = min(Workers or os.cpu_count() or 1, MaxRuns)
+	Stats = dict()	# Column --> RunningStat
+	Table = []	# retained runs, in run order
+	Arrived = dict()	# RunId --> (Status, Summary) of runs waiting for previous runs
+	Done = Queue()	# results come back through pool callbacks
+
+	def job(RunId):
+		Cfg = dict(Base)
+		Cfg.update({'RandomSeed': BaseSeed + RunId, 'BatchMode': 1, 'StopFile': 0})
+		return (RunId, Cfg, Timeout)
+
+	def precise():
+		return (len(Stats) > 0 and all(S.N >= MinRuns for S in Stats.values())
+				and max(S.halfwidth(Confidence) for S in Stats.values()) <= Precision)
+
+	try:	Context = multiprocessing.get_context('fork')
+	except ValueError:	Context = multiprocessing.get_context()
+	(Started, Owners) = (Context.SimpleQueue(), dict())
+	with Context.Pool(Workers, initializer=warmup, initargs=(Started,)) as Pool:
+		Launched = 0
+		InFlight = dict()	# RunId --> AsyncResult
+		while InFlight or (Launched < MaxRuns and not precise()):
+			while len(InFlight) < Workers and Launched < MaxRuns and not precise():
+				InFlight[Launched] = Pool.apply_async(tracked, (job(Launched),), callback=Done.put,
+								 error_callback=lambda E, RunId=Launched: Done.put((RunId, f'error: {E}', [])))
+				Launched += 1
+			try:	(RunId, Status, Summary) = Done.get(timeout=POLLPERIOD)
+			except Empty:
+				Lost = lost(InFlight, Started, Owners)
+				if not Lost:	continue
+				(RunId, Status, Summary) = (Lost[0], 'lost', [])
+			del InFlight[RunId]
+			if precise():	
+				if Verbose:	print(f'run {RunId}: {Status} (ignored, precision already reached)')
+				continue
+			Arrived[RunId] = (Status, Summary)
+			# ====== runs are taken into account in order, as long as precision is not reached
+			while len(Table) in Arrived and not precise():
+				RunId = len(Table)
+				(Status, Summary) = Arrived.pop(RunId)
+				Values = dict()
+				if Status == 'ok':
+					Names = [N for (N, V) in Summary]
+					if Columns is None:	# curves are listed after 'LastStep'
+						Columns = Names[Names.index('LastStep')+1:] if 'LastStep' in Names else []
+					Summary = dict(Summary)
+					try:	Values = {C: float(Summary[C]) for C in Columns}
+					except (KeyError, ValueError) as Msg:	Status = f'error: no value for {Msg}'
+				for C in Values:	Stats.setdefault(C, RunningStat()).add(Values[C])
+				Table.append((RunId, BaseSeed + RunId, Status, Values))
+				if Verbose:	print(f'run {RunId}: {Status}  ' + '  '.join([f'{C[:20]}: {S.Mean:.2f} +- {S.halfwidth(Confidence):.2f}' for (C, S) in Stats.items()]))
+	Columns = Columns or []
+	if Prefix is None:	Prefix = os.path.splitext(os.path.basename(BaseFile))[0]
+	with open(Prefix + '_replicates.csv', 'w') as Filout:
+		Lines = [';'.join(['Run', 'Seed', 'Status'] + Columns)]
+		Lines += [';'.join([str(RunId), str(Seed), Status] + [f'{Values[C]:.2f}' if C in Values else '' for C in Columns]) 
+					for (RunId, Seed, Status, Values) in Table]
+		Lines.append(';'.join(['Mean', '', ''] + [f'{Stats[C].Mean:.3f}' if C in Stats else '' for C in Columns]))
+		Lines.append(';'.join(['HalfWidth', '', f'{Confidence:.0%}'] + [f'{Stats[C].halfwidth(Confidence):.3f}' if C in Stats else '' for C in Columns]))
+		Filout.write('\n'.join(Lines) + '\n')
+	if Verbose:	
+		print(f"{'Precision reached' if precise() else 'Precision NOT reached'} after {len(Table)} runs")
+		print(f'------- {Prefix}_replicates.csv has been created')
+	return {C: (S.Mean, S.halfwidth(Confidence), S.N) for (C, S) in Stats.items()}
+
+
+#########################################
+# Command line                          #
+#########################################
+
+def usage(Command):
+	print(f"""\nUsage:
+	{Command} <Base.evo> <Specification> [-m grid|random|lhs] [-n <samples>] [-r <replicates>]
+		[-w <workers>] [-t <timeout in seconds>] [-o <output prefix>]
+	{Command} <Base.evo> -p <precision> [-c <column>[+<column>]*] [-r <max number of runs>]
+		[-w <workers>] [-t <timeout in seconds>] [-o <output prefix>]
+
+	<Specification>: python dictionary, e.g. "{{'MutationRate': [1, 2, 5], 'PopulationSize': (100, 400)}}"
+	<precision>: runs are replicated until 95% confidence intervals of result columns are that narrow (half width)
+	""")
+
+def main():
+	try:
+		(Options, Args) = getopt.gnu_getopt(sys.argv[1:], 'hm:n:r:w:t:o:p:c:')
+	except getopt.GetoptError:	Options, Args = [('-h', '')], []
+	Options = dict(Options)
+	if '-h' in Options or len(Args) != (1 if '-p' in Options else 2):
+		usage(os.path.basename(sys.argv[0]))
+		return
+	if '-p' in Options:
+		Replicate(Args[0], float(Options['-p']), Columns=Options['-c'].split('+') if '-c' in Options else None,
+				  MaxRuns=int(Options.get('-r', 100)), Workers=int(Options.get('-w', 0)),
+				  Timeout=float(Options.get('-t', 0)), Prefix=Options.get('-o'))
+		return
+	from Evolife.Scenarii.Parameters import Alph
+	Spec = Alph(Args[1])
+	if not isinstance(Spec, dict):	error('Sweep', f'Specification should be a dictionary: {Args[1]}')
+	Sweep(Args[0], Spec, Mode=Options.get('-m', 'grid'), Samples=int(Options.get('-n', 10)),
+		  Replicates=int(Options.get('-r', 1)), Workers=int(Options.get('-w', 0)),
+		  Timeout=float(Options.get('-t', 0)), Prefix=Options.get('-o'))
+
+if __name__ == "__main__":
+	main()
+
+
+__author__ = 'Dessalles'
@@ -21,10 +21,13 @@
 
 
 import sys
+import os
 import re
 import random
 import time
+import pickle
 from math import floor, modf, log, exp
+from collections import deque
 
 try:
 	from Evolife.Tools import EvolifeGray
@@ -71,27 +74,28 @@ def decrease(x, M, Selection):
 	# return (1+x) ** -DropCoefficient
 
 
-def chances(proba, N):
+def chances(proba, N, Rnd=random):
 	"""	computes what one gets from a maximum of N with probability proba
+		(Rnd: random generator, e.g. a stream from RandomStreams)
 	"""
 	C = N * proba
-	if random.random() < modf(C)[0]:	# modf(3.14) == (0.14, 3.0) ;  modf(3.14)[0] ==  0.14
+	if Rnd.random() < modf(C)[0]:	# modf(3.14) == (0.14, 3.0) ;  modf(3.14)[0] ==  0.14
 		return int(C) + 1
 	return int(C)
 
-def uniform(proba, Max=1):
+def uniform(proba, Max=1, Rnd=random):
 	"""	computes random uniform variable between 0 and Max
 	"""
 	if isinstance(Max, int) and Max > 1:
-		return random.randint(0, Max) <= proba
+		return Rnd.randint(0, Max) <= proba
 	else:
-		return Max * random.random() <= proba
+		return Max * Rnd.random() <= proba
 
-def fortune_wheel(Probabilities):
+def fortune_wheel(Probabilities, Rnd=random):
 	"""	draws one one the pie shares y picking a location uniformly
 	"""
 	if Probabilities == []:	error('Calling Fortune Wheel with no probabilities')
-	Lottery = random.uniform(0, sum(Probabilities))
+	Lottery = Rnd.uniform(0, sum(Probabilities))
 	P = 0	# cumulative probability
 	for p in enumerate(Probabilities):
 		P += p[1]
@@ -100,19 +104,19 @@ def fortune_wheel(Probabilities):
 
 def percent(x):	return float(x) / 100
 
-def noise_mult(x, range_):
+def noise_mult(x, range_, Rnd=random):
 	""" returns x affected by a multiplicative uniform noise
 		between 1-range_/100 and 1+range_/100
 	"""
 	if (range_ > 100):
 			error("Tools: noise amplitude", str(range_))
-	return x * (1.0 + percent((2 * random.random() - 1) * range_))
+	return x * (1.0 + percent((2 * Rnd.random() - 1) * range_))
 
-def noise_add(x, range_):
+def noise_add(x, range_, Rnd=random):
 	""" returns x affected by an additive uniform noise
 		between -range_ and range_
 	"""
-	return x + ((2 * random.random() - 1) * range_)
+	return x + ((2 * Rnd.random() - 1) * range_)
 
 def transpose(Matrix):
 	"""	groups ith items in each list of Matrix
@@ -204,6 +208,48 @@ def List2File(L, FileName):
 	Filout.write('\n'.join(L))
 	Filout.close()
 
+def saveState(State, FileName):
+	"""	Pickles State into FileName atomically: 
+		the file is either the previous one or the complete new one
+	"""
+	Limit = sys.getrecursionlimit()
+	sys.setrecursionlimit(max(Limit, 100000))	# agents' links make deep object graphs
+	try:
+		with open(FileName + '.tmp', 'wb') as Filout:
+			pickle.dump(State, Filout, protocol=pickle.HIGHEST_PROTOCOL)
+			Filout.flush()
+			os.fsync(Filout.fileno())
+		os.replace(FileName + '.tmp', FileName)
+	finally:	sys.setrecursionlimit(Limit)
+
+def loadState(FileName):
+	"""	Reads a state saved by saveState
+	"""
+	Limit = sys.getrecursionlimit()
+	sys.setrecursionlimit(max(Limit, 100000))
+	try:
+		with open(FileName, 'rb') as Filin:	return pickle.load(Filin)
+	finally:	sys.setrecursionlimit(Limit)
+
+def fileState(File):
+	"""	Picklable description of an open output file: (name, current size)
+	"""
+	if File is None or File.closed:	return None
+	File.flush()
+	return (File.name, File.tell())
+
+def reopenFile(State):
+	"""	Reopens a file described by fileState, discarding what has been written since
+		(if the file has disappeared, it is recreated empty)
+	"""
+	if State is None:	return None
+	(FileName, Size) = State
+	if not os.path.exists(FileName):	return open(FileName, 'w')
+	File = open(FileName, 'r+')
+	File.seek(Size)
+	File.truncate()
+	return File
+
 class EvolifeError(Exception):
 	def __init__(self, Origine, Msg):
 		self.Origine = Origine
@@ -212,7 +258,50 @@ class EvolifeError(Exception):
 	def __str__(self):
 		return(f'{self.Origine}: {self.Message}')
 		
-def errorDisplay(ErrMsg, Explanation=''):
+# ====== Error policy
+# 'interactive': errors are displayed and wait for [Enter] before being raised
+# 'log': errors and warnings are logged as one line (see errorLog) - errors are then raised, 
+#	warnings let the run continue; nothing ever waits for the keyboard
+# 'raise': same as 'log', but warnings are raised too
+ERRORPOLICIES = ('interactive', 'log', 'raise')
+ErrorPolicy = 'interactive'
+ErrorLogFile = None		# None: sys.stderr
+ErrorContext = dict()	# current simulation context (e.g. 'Year', updated by observers), added to log lines
+
+def errorPolicy(Policy=None, LogFile=None):
+	"""	Sets how errors and warnings are handled (see ERRORPOLICIES) 
+		and where they are logged (file name, None for standard error output).
+		Returns the current policy
+	"""
+	global ErrorPolicy, ErrorLogFile
+	if Policy is not None:
+		if Policy not in ERRORPOLICIES:	
+			error('Tools: unknown error policy', '%s (should be in %s)' % (Policy, str(ERRORPOLICIES)))
+		ErrorPolicy = Policy
+		ErrorLogFile = LogFile
+	return ErrorPolicy
+
+def errorLog(Level, Msg, Explanation='', **Context):
+	"""	Writes a single line: time, level, message and context fields (tab-separated Name=Value)
+	"""
+	Fields = [time.strftime('%Y-%m-%d %H:%M:%S'), Level, str(Msg).strip()]
+	if Explanation != '':	Fields.append('Explanation=%s' % str(Explanation).strip())
+	Context = dict(ErrorContext, **Context)
+	Fields += ['%s=%s' % (C, Context[C]) for C in sorted(Context)]
+	Line = '\t'.join([F.replace('\t', ' ').replace('\n', ' ') for F in Fields]) + '\n'
+	if ErrorLogFile is None:	sys.stderr.write(Line)
+	else:
+		with open(ErrorLogFile, 'a') as Log:	Log.write(Line)
+
+def pause(Prompt='[Enter]'):
+	"""	Waits for [Enter], only when errors are handled interactively
+	"""
+	if ErrorPolicy == 'interactive':	input(Prompt)
+
+def errorDisplay(ErrMsg, Explanation='', **Context):
+	if ErrorPolicy != 'interactive':	
+		errorLog('ERROR', ErrMsg, Explanation, **Context)
+		return
 	print("\n\n******** ERROR ************")
 	print(ErrMsg)
 	if Explanation:	print(Explanation)
@@ -226,31 +315,46 @@ def errorDisplay(ErrMsg, Explanation=''):
 	input('[Enter]')
 	# sys.stdin.readline()
 	
-def error(ErrMsg, Explanation=''):
-	errorDisplay(ErrMsg, Explanation)
+def error(ErrMsg, Explanation='', **Context):
+	"""	Reports an error according to ErrorPolicy and raises EvolifeError.
+		Context: additional fields for the log (e.g. Parameter=...)
+	"""
+	errorDisplay(ErrMsg, Explanation, **Context)
 	E = EvolifeError(ErrMsg, Explanation)
 	raise E
 	return str(E)
 
-def warning(WMsg, Explanation=''):
-	print("\n-------- WARNING -------- %s %s -------- WARNING --------\n" % (WMsg, Explanation))
+def warning(WMsg, Explanation='', **Context):
+	if ErrorPolicy == 'interactive':
+		print("\n-------- WARNING -------- %s %s -------- WARNING --------\n" % (WMsg, Explanation))
+		return
+	errorLog('WARNING', WMsg, Explanation, **Context)
+	if ErrorPolicy == 'raise':	raise EvolifeError(WMsg, Explanation)
 	#raw_input('Press [Return] to exit')
 
 class LimitedMemory:
-	"""	memory buffer with limited length 
+	"""	memory buffer with limited length (ring buffer)
+		Version changes whenever memory content changes
 	"""
 
 	def __init__(self, MaxLength):
 		self.MaxLength = MaxLength
+		self.Version = 0
 		self.reset()
 
 	def __len__(self):	 return len(self.past)
 	
-	def reset(self):	self.past = []
+	def reset(self):	
+		self.past = deque(maxlen=max(1, self.MaxLength))
+		self.Version += 1
 	
 	def push(self, Item):
-		self.past = self.past[-self.MaxLength+1:]
+		"""	stores Item and returns the item that is forgotten as a consequence, if any
+		"""
+		Forgotten = self.past[0] if len(self.past) == self.past.maxlen else None
 		self.past.append(Item)
+		self.Version += 1
+		return Forgotten
 		
 	def complete(self):
 		"""	full experience
@@ -260,11 +364,13 @@ class LimitedMemory:
 	def retrieve(self): return self.past
 
 	def last(self):
-		if self.past != []: return self.past[-1]
+		if self.past: return self.past[-1]
 		return None
 
 	def pull(self):
-		if self.past != []: return self.past.pop()
+		if self.past: 
+			self.Version += 1
+			return self.past.pop()
 		return None
 	
 	def append(self, Item):	return self.push(Item)
@@ -274,7 +380,7 @@ class LimitedMemory:
 	def __str__(self):
 		# return ' '.join(["(%s, %0.1f)" % (str(p),v) for (p,v) in self.past])
 		# return ' '.join(["%0.1f" % b[1] for b in self.past])
-		return str(self.past)
+		return str(list(self.past))
 
 #########
 # Boost #